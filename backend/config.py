@@ -4,6 +4,7 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     tmdb_api_key: str
     database_url: str = "sqlite:///./whist.db"
+    tmdb_cache_dir: str = "./.tmdb_cache"
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from backend.config import settings
@@ -6,9 +6,39 @@ from backend.config import settings
 engine = create_engine(
     settings.database_url,
     connect_args={"check_same_thread": False},
+    insertmanyvalues_page_size=1000,
+    # Headroom for sync handlers plus worker-thread offloads running at once
+    pool_size=10,
+    max_overflow=20,
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    """WAL turns commits into appends; NORMAL sync drops the per-commit fsync."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")   # 256 MiB
+    cursor.execute("PRAGMA cache_size=-65536")     # 64 MiB
+    cursor.execute("PRAGMA busy_timeout=5000")     # wait out a concurrent writer instead of failing
+    cursor.close()
+
+
+def checkpoint() -> None:
+    """Fold the WAL back into the main database file.
+
+    docker-compose bind-mounts only whist.db, so anything left in the -wal
+    sidecar would not survive the container being recreated.
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+# Sessions live for one request, so objects can't go stale between a commit and
+# the response — skip the expire-and-reload round trip after every commit.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 class Base(DeclarativeBase):
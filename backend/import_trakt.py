@@ -6,11 +6,11 @@ Usage:
     uv run python backend/import_trakt.py /path/to/watched-shows.json
 
 The script is safe to re-run — shows and episodes already in the DB are
-skipped, and already-watched episodes are left unchanged.
+skipped, and already-watched episodes are left unchanged. Shows whose Trakt
+last_watched_at hasn't moved since the previous import are skipped outright.
 """
 
 import asyncio
-import json
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,7 +18,8 @@ from pathlib import Path
 # Ensure project root is on sys.path when run as a script
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from sqlalchemy import select
+import ijson
+from sqlalchemy import insert, select, update
 
 from backend.database import Base, SessionLocal, engine
 from backend import models, tmdb
@@ -31,90 +32,119 @@ _ACTIVE_STATUSES = {"Returning Series", "In Production", "Planned", "Pilot"}
 async def import_trakt(filepath: str) -> None:
     Base.metadata.create_all(bind=engine)
 
-    data = json.loads(Path(filepath).read_text())
     db = SessionLocal()
+    print(f"Importing shows from {filepath}\n")
 
-    total = len(data)
-    print(f"Found {total} shows in {filepath}\n")
+    # Every tracked show in one query, instead of a lookup per Trakt entry
+    tracked = {show.tmdb_id: show for show in db.execute(select(models.Show)).scalars()}
 
-    imported = skipped = total_eps = 0
+    imported = skipped = unchanged = total_eps = 0
+    # One timestamp for the whole run rather than a clock read per new show
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-    for i, entry in enumerate(data, 1):
-        meta   = entry["show"]
-        tmdb_id = meta["ids"].get("tmdb")
-        title  = meta.get("title", "Unknown")
+    # Stream one show entry at a time rather than loading the whole export
+    with open(filepath, "rb") as f:
+        for i, entry in enumerate(ijson.items(f, "item"), 1):
+            meta   = entry["show"]
+            tmdb_id = meta["ids"].get("tmdb")
+            title  = meta.get("title", "Unknown")
 
-        if not tmdb_id:
-            print(f"  [{i:>3}/{total}] SKIP  {title}  (no TMDB ID)")
-            skipped += 1
-            continue
+            if not tmdb_id:
+                print(f"  [{i:>3}] SKIP  {title}  (no TMDB ID)")
+                skipped += 1
+                continue
+
+            print(f"  [{i:>3}] {title}", end="", flush=True)
 
-        print(f"  [{i:>3}/{total}] {title}", end="", flush=True)
+            # ── 1. Add show to DB if not already tracked ────────────────────
+            show = tracked.get(tmdb_id)
+            trakt_ts = entry.get("last_watched_at")
 
-        # ── 1. Add show to DB if not already tracked ────────────────────────
-        show = db.execute(
-            select(models.Show).where(models.Show.tmdb_id == tmdb_id)
-        ).scalar_one_or_none()
+            if show and trakt_ts and show.last_trakt_synced_at == trakt_ts:
+                # Nothing watched on Trakt since the last import
+                print("  –  (unchanged since last import)")
+                unchanged += 1
+                continue
 
-        if not show:
+            if not show:
+                try:
+                    details = await tmdb.get_show(tmdb_id)
+                    tmdb_status = details.get("status", "Ended")
+                    show = models.Show(
+                        tmdb_id=tmdb_id,
+                        title=details.get("name", title),
+                        poster_path=details.get("poster_path"),
+                        user_status="airing" if tmdb_status in _ACTIVE_STATUSES else "finished",
+                        type="tv",
+                        added_at=now_iso,
+                        last_watched_at=trakt_ts,
+                        first_air_date=details.get("first_air_date"),
+                    )
+                    db.add(show)
+                    db.commit()
+                    tracked[tmdb_id] = show
+                except Exception as e:
+                    print(f"  ✗  (TMDB show fetch failed: {e})")
+                    skipped += 1
+                    continue
+            else:
+                # Keep last_watched_at up to date
+                if trakt_ts and (not show.last_watched_at or trakt_ts > show.last_watched_at):
+                    show.last_watched_at = trakt_ts
+
+            # ── 2. Fetch and cache all episodes from TMDB (skipped if cached) ───
             try:
-                details = await tmdb.get_show(tmdb_id)
-                tmdb_status = details.get("status", "Ended")
-                show = models.Show(
-                    tmdb_id=tmdb_id,
-                    title=details.get("name", title),
-                    poster_path=details.get("poster_path"),
-                    user_status="airing" if tmdb_status in _ACTIVE_STATUSES else "finished",
-                    type="tv",
-                    added_at=datetime.now(timezone.utc).isoformat(),
-                    last_watched_at=entry.get("last_watched_at"),
-                )
-                db.add(show)
-                db.commit()
-                db.refresh(show)
+                await _ensure_episodes_cached(show, db)
             except Exception as e:
-                print(f"  ✗  (TMDB show fetch failed: {e})")
+                print(f"  ✗  (episode fetch failed: {e})")
                 skipped += 1
                 continue
-        else:
-            # Keep last_watched_at up to date
-            trakt_ts = entry.get("last_watched_at")
-            if trakt_ts and (not show.last_watched_at or trakt_ts > show.last_watched_at):
-                show.last_watched_at = trakt_ts
-
-        # ── 2. Fetch and cache all episodes from TMDB (skipped if cached) ───
-        try:
-            await _ensure_episodes_cached(show, db)
-        except Exception as e:
-            print(f"  ✗  (episode fetch failed: {e})")
-            skipped += 1
-            continue
-
-        # ── 3. Mark watched episodes ────────────────────────────────────────
-        marked = 0
-        for season in entry.get("seasons", []):
-            for ep in season.get("episodes", []):
-                record = db.execute(
-                    select(models.Episode).where(
+
+            # ── 3. Mark watched episodes ────────────────────────────────────
+            unwatched = {
+                (row.season_number, row.episode_number): row.id
+                for row in db.execute(
+                    select(
+                        models.Episode.id,
+                        models.Episode.season_number,
+                        models.Episode.episode_number,
+                    ).where(
                         models.Episode.tmdb_show_id == tmdb_id,
-                        models.Episode.season_number == season["number"],
-                        models.Episode.episode_number == ep["number"],
+                        models.Episode.watched == False,  # noqa: E712
                     )
-                ).scalar_one_or_none()
-                if record and not record.watched:
-                    record.watched = True
-                    record.watched_at = ep.get("last_watched_at")
-                    marked += 1
-
-        db.commit()
-        total_eps += marked
-        imported += 1
-        print(f"  ✓  ({marked} eps)")
+                )
+            }
+            updates, history = [], []
+            for season in entry.get("seasons", []):
+                for ep in season.get("episodes", []):
+                    ep_id = unwatched.pop((season["number"], ep["number"]), None)
+                    if ep_id is not None:
+                        watched_at = (ep.get("last_watched_at") or "")[:10] or None
+                        updates.append({"id": ep_id, "watched": True, "watched_at": watched_at})
+                        history.append({
+                            "tmdb_show_id": tmdb_id,
+                            "season_number": season["number"],
+                            "episode_number": ep["number"],
+                            "watched_at": watched_at,
+                        })
+            if updates:
+                # Bulk UPDATE by primary key — one executemany instead of a SELECT per episode
+                db.execute(update(models.Episode), updates)
+                db.execute(insert(models.WatchHistory), history)
+            marked = len(updates)
+
+            show.last_trakt_synced_at = trakt_ts
+            db.commit()
+            total_eps += marked
+            imported += 1
+            print(f"  ✓  ({marked} eps)")
 
     db.close()
 
     print(f"\n{'─' * 52}")
     print(f"Done.  {imported} shows imported,  {total_eps} episodes marked watched.")
+    if unchanged:
+        print(f"       {unchanged} shows unchanged since the last import.")
     if skipped:
         print(f"       {skipped} shows skipped (no TMDB ID or fetch error).")
 
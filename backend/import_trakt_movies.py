@@ -33,6 +33,8 @@ async def import_trakt_movies(filepath: str) -> None:
     print(f"Found {total} movies in {filepath}\n")
 
     imported = skipped = already = 0
+    # One timestamp for the whole run rather than a clock read per new movie
+    now_iso = datetime.now(timezone.utc).isoformat()
 
     for i, entry in enumerate(data, 1):
         meta    = entry["movie"]
@@ -86,7 +88,7 @@ async def import_trakt_movies(filepath: str) -> None:
             poster_path=details.get("poster_path"),
             user_status="finished",
             type="movie",
-            added_at=datetime.now(timezone.utc).isoformat(),
+            added_at=now_iso,
             first_air_date=details.get("release_date"),
             watched=True,
             watched_at=watched_at or None,
@@ -1,171 +1,496 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from sqlalchemy import text
 
-from backend.database import Base, engine
+from backend import tmdb
+from backend.database import Base, checkpoint, engine
 from backend.routers import episodes, movies, people, schedule, shows
 
 # Create all tables on startup (idempotent)
 Base.metadata.create_all(bind=engine)
 
 
+# Bump when adding a migration below
+_SCHEMA_VERSION = 25
+
+# people.seen_in_count trigger SQL (migrations 17 and 24). A show counts as
+# watched once it has a watched episode, or is a movie marked watched.
+_IS_WATCHED = """(
+    EXISTS (SELECT 1 FROM episodes e WHERE e.tmdb_show_id = {show} AND e.watched = 1)
+    OR EXISTS (SELECT 1 FROM shows s
+               WHERE s.tmdb_id = {show} AND s.type = 'movie' AND s.watched = 1)
+)"""
+_SEEN_IN_RECOUNT = f"""
+    UPDATE people SET seen_in_count = (
+        SELECT COUNT(DISTINCT pc.show_tmdb_id) FROM person_credits pc
+        WHERE pc.person_tmdb_id = people.tmdb_id
+          AND {_IS_WATCHED.format(show="pc.show_tmdb_id")}
+    )
+"""
+_CREDITED_IN = "WHERE tmdb_id IN (SELECT person_tmdb_id FROM person_credits WHERE show_tmdb_id = {show})"
+# First watched episode of a show. NOT EXISTS over the other rows stays constant
+# per row, where a COUNT(*) made a set-based bulk mark quadratic.
+_SEEN_IN_EPISODE_WATCHED = f"""
+    CREATE TRIGGER IF NOT EXISTS trg_seen_in_episode_watched
+    AFTER UPDATE OF watched ON episodes
+    WHEN NEW.watched = 1 AND COALESCE(OLD.watched, 0) = 0
+     AND NOT EXISTS (SELECT 1 FROM episodes
+                     WHERE tmdb_show_id = NEW.tmdb_show_id AND watched = 1 AND id != NEW.id)
+    BEGIN
+        {_SEEN_IN_RECOUNT} {_CREDITED_IN.format(show="NEW.tmdb_show_id")};
+    END
+"""
+
+
 def _run_migrations() -> None:
-    """Inline schema migrations — safe to re-run on every startup."""
+    """Inline schema migrations, gated on PRAGMA user_version.
+
+    Each step only runs on databases older than its number, so an up-to-date
+    database costs a single PRAGMA read at startup. Steps stay idempotent.
+    """
     with engine.connect() as conn:
-        # Migration 1: add user_status column if not present, populate from status
-        try:
-            conn.execute(text("SELECT user_status FROM shows LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE shows ADD COLUMN user_status VARCHAR"))
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        if version >= _SCHEMA_VERSION:
+            return
+
+        if version < 1:
+            # Migration 1: add user_status column if not present, populate from status
+            try:
+                conn.execute(text("SELECT user_status FROM shows LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE shows ADD COLUMN user_status VARCHAR"))
+                conn.execute(text("""
+                    UPDATE shows
+                    SET user_status = CASE WHEN status = 'watching' THEN 'airing' ELSE 'done' END
+                """))
+                conn.commit()
+
+        if version < 2:
+            # Migration 2: backfill any rows that still have NULL user_status
             conn.execute(text("""
                 UPDATE shows
                 SET user_status = CASE WHEN status = 'watching' THEN 'airing' ELSE 'done' END
+                WHERE user_status IS NULL
+            """))
+
+        if version < 4:
+            # Migration 4: rename status values to new 5-value taxonomy
+            conn.execute(text("""
+                UPDATE shows SET user_status = CASE
+                    WHEN user_status = 'binging'   THEN 'watching'
+                    WHEN user_status = 'caught_up' THEN 'airing'
+                    WHEN user_status = 'done'      THEN 'finished'
+                    ELSE user_status
+                END
+                WHERE user_status IN ('binging', 'caught_up', 'done')
+            """))
+
+        if version < 3:
+            # Migration 3: truncate watched_at timestamps to YYYY-MM-DD
+            conn.execute(text("""
+                UPDATE episodes
+                SET watched_at = substr(watched_at, 1, 10)
+                WHERE watched_at IS NOT NULL AND length(watched_at) > 10
+            """))
+        if version < 5:
+            # Migration 5: create watch_history table and backfill from episodes.watched_at
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS watch_history (
+                    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tmdb_show_id   INTEGER NOT NULL,
+                    season_number  INTEGER NOT NULL,
+                    episode_number INTEGER NOT NULL,
+                    watched_at     TEXT
+                )
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_watch_history_episode
+                    ON watch_history (tmdb_show_id, season_number, episode_number)
+            """))
+            conn.execute(text("""
+                INSERT INTO watch_history (tmdb_show_id, season_number, episode_number, watched_at)
+                SELECT tmdb_show_id, season_number, episode_number, watched_at
+                FROM episodes
+                WHERE watched = 1
+                  AND NOT EXISTS (
+                    SELECT 1 FROM watch_history wh
+                    WHERE wh.tmdb_show_id   = episodes.tmdb_show_id
+                      AND wh.season_number  = episodes.season_number
+                      AND wh.episode_number = episodes.episode_number
+                  )
             """))
             conn.commit()
 
-        # Migration 2: backfill any rows that still have NULL user_status
-        conn.execute(text("""
-            UPDATE shows
-            SET user_status = CASE WHEN status = 'watching' THEN 'airing' ELSE 'done' END
-            WHERE user_status IS NULL
-        """))
-
-        # Migration 4: rename status values to new 5-value taxonomy
-        conn.execute(text("""
-            UPDATE shows SET user_status = CASE
-                WHEN user_status = 'binging'   THEN 'watching'
-                WHEN user_status = 'caught_up' THEN 'airing'
-                WHEN user_status = 'done'      THEN 'finished'
-                ELSE user_status
-            END
-            WHERE user_status IN ('binging', 'caught_up', 'done')
-        """))
-
-        # Migration 3: truncate watched_at timestamps to YYYY-MM-DD
-        conn.execute(text("""
-            UPDATE episodes
-            SET watched_at = substr(watched_at, 1, 10)
-            WHERE watched_at IS NOT NULL AND length(watched_at) > 10
-        """))
-        # Migration 5: create watch_history table and backfill from episodes.watched_at
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS watch_history (
-                id             INTEGER PRIMARY KEY AUTOINCREMENT,
-                tmdb_show_id   INTEGER NOT NULL,
-                season_number  INTEGER NOT NULL,
-                episode_number INTEGER NOT NULL,
-                watched_at     TEXT
-            )
-        """))
-        conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS ix_watch_history_episode
-                ON watch_history (tmdb_show_id, season_number, episode_number)
-        """))
-        conn.execute(text("""
-            INSERT INTO watch_history (tmdb_show_id, season_number, episode_number, watched_at)
-            SELECT tmdb_show_id, season_number, episode_number, watched_at
-            FROM episodes
-            WHERE watched = 1
-              AND NOT EXISTS (
-                SELECT 1 FROM watch_history wh
-                WHERE wh.tmdb_show_id   = episodes.tmdb_show_id
-                  AND wh.season_number  = episodes.season_number
-                  AND wh.episode_number = episodes.episode_number
-              )
-        """))
-        conn.commit()
+        if version < 6:
+            # Migration 6: add watch_pace column (binge | fast | weekly)
+            try:
+                conn.execute(text("SELECT watch_pace FROM shows LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE shows ADD COLUMN watch_pace VARCHAR DEFAULT 'binge'"))
+                conn.commit()
 
-        # Migration 6: add watch_pace column (binge | fast | weekly)
-        try:
-            conn.execute(text("SELECT watch_pace FROM shows LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE shows ADD COLUMN watch_pace VARCHAR DEFAULT 'binge'"))
+        if version < 9:
+            # Migration 9: add first_air_date to shows; backfill from earliest episode air_date
+            try:
+                conn.execute(text("SELECT first_air_date FROM shows LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE shows ADD COLUMN first_air_date TEXT"))
+                conn.commit()
+            conn.execute(text("""
+                UPDATE shows
+                SET first_air_date = (
+                    SELECT MIN(air_date) FROM episodes
+                    WHERE tmdb_show_id = shows.tmdb_id AND air_date IS NOT NULL
+                )
+                WHERE first_air_date IS NULL
+            """))
             conn.commit()
 
-        # Migration 9: add first_air_date to shows; backfill from earliest episode air_date
-        try:
-            conn.execute(text("SELECT first_air_date FROM shows LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE shows ADD COLUMN first_air_date TEXT"))
+        if version < 7:
+            # Migration 7: add first_air_date to person_credits
+            try:
+                conn.execute(text("SELECT first_air_date FROM person_credits LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE person_credits ADD COLUMN first_air_date TEXT"))
+                conn.commit()
+
+        if version < 10:
+            # Migration 10: add watched + watched_at to shows (for movies)
+            try:
+                conn.execute(text("SELECT watched FROM shows LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE shows ADD COLUMN watched BOOLEAN DEFAULT 0"))
+                conn.execute(text("ALTER TABLE shows ADD COLUMN watched_at TEXT"))
+                conn.commit()
+
+        if version < 11:
+            # Migration 11: add birthday to people
+            try:
+                conn.execute(text("SELECT birthday FROM people LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE people ADD COLUMN birthday TEXT"))
+                conn.commit()
+
+        if version < 12:
+            # Migration 12: add imdb_id to people
+            try:
+                conn.execute(text("SELECT imdb_id FROM people LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE people ADD COLUMN imdb_id TEXT"))
+                conn.commit()
+
+        if version < 13:
+            # Migration 13: create show_wikis table
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS show_wikis (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    show_tmdb_id INTEGER NOT NULL,
+                    label TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    season_url_template TEXT
+                )
+            """))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_show_wikis_show ON show_wikis (show_tmdb_id)"
+            ))
             conn.commit()
-        conn.execute(text("""
-            UPDATE shows
-            SET first_air_date = (
-                SELECT MIN(air_date) FROM episodes
-                WHERE tmdb_show_id = shows.tmdb_id AND air_date IS NOT NULL
-            )
-            WHERE first_air_date IS NULL
-        """))
-        conn.commit()
 
-        # Migration 7: add first_air_date to person_credits
-        try:
-            conn.execute(text("SELECT first_air_date FROM person_credits LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE person_credits ADD COLUMN first_air_date TEXT"))
+        if version < 8:
+            # Migration 8: create episode_credits table
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS episode_credits (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    person_tmdb_id INTEGER NOT NULL,
+                    show_tmdb_id INTEGER NOT NULL,
+                    season_number INTEGER NOT NULL,
+                    episode_number INTEGER NOT NULL,
+                    character TEXT,
+                    UNIQUE(person_tmdb_id, show_tmdb_id, season_number, episode_number)
+                )
+            """))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_episode_credits_person ON episode_credits (person_tmdb_id)"
+            ))
             conn.commit()
 
-        # Migration 10: add watched + watched_at to shows (for movies)
-        try:
-            conn.execute(text("SELECT watched FROM shows LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE shows ADD COLUMN watched BOOLEAN DEFAULT 0"))
-            conn.execute(text("ALTER TABLE shows ADD COLUMN watched_at TEXT"))
+        if version < 14:
+            # Migration 14: covering index for per-show progress; drop episode indexes
+            # duplicated by the primary key and the (show, season, episode) unique key
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_episodes_tmdb_watched_season_ep
+                    ON episodes (tmdb_show_id, watched, season_number, episode_number)
+            """))
+            conn.execute(text("DROP INDEX IF EXISTS ix_episodes_tmdb_show_id"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_episodes_id"))
             conn.commit()
 
-        # Migration 11: add birthday to people
-        try:
-            conn.execute(text("SELECT birthday FROM people LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE people ADD COLUMN birthday TEXT"))
+        if version < 15:
+            # Migration 15: add last_trakt_synced_at to shows
+            try:
+                conn.execute(text("SELECT last_trakt_synced_at FROM shows LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE shows ADD COLUMN last_trakt_synced_at VARCHAR"))
+                conn.commit()
+
+        if version < 16:
+            # Migration 16: index for the schedule's aired-episode filter, then refresh
+            # planner statistics so SQLite weighs the composite indexes correctly
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_episodes_tmdb_watched_air
+                    ON episodes (tmdb_show_id, watched, air_date)
+            """))
+            conn.execute(text("ANALYZE"))
             conn.commit()
 
-        # Migration 12: add imdb_id to people
-        try:
-            conn.execute(text("SELECT imdb_id FROM people LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE people ADD COLUMN imdb_id TEXT"))
+        if version < 17:
+            # Migration 17: denormalized people.seen_in_count — distinct watched shows
+            # (TV with a watched episode, or watched movies) the person is credited in.
+            # Kept current by triggers, so every writer (API or Trakt importer) agrees.
+            try:
+                conn.execute(text("SELECT seen_in_count FROM people LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE people ADD COLUMN seen_in_count INTEGER DEFAULT 0"))
+            conn.execute(text(_SEEN_IN_RECOUNT))
+
+            # Recount a show's people only when the show itself flips watched/unwatched:
+            # first episode watched, last episode unwatched, or a movie toggled
+            conn.execute(text(_SEEN_IN_EPISODE_WATCHED))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_seen_in_episode_unwatched
+                AFTER UPDATE OF watched ON episodes
+                WHEN COALESCE(NEW.watched, 0) = 0 AND OLD.watched = 1
+                 AND NOT EXISTS (SELECT 1 FROM episodes
+                                 WHERE tmdb_show_id = NEW.tmdb_show_id AND watched = 1)
+                BEGIN
+                    {_SEEN_IN_RECOUNT} {_CREDITED_IN.format(show="NEW.tmdb_show_id")};
+                END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_seen_in_movie_watched
+                AFTER UPDATE OF watched ON shows
+                WHEN NEW.type = 'movie' AND COALESCE(OLD.watched, 0) != COALESCE(NEW.watched, 0)
+                BEGIN
+                    {_SEEN_IN_RECOUNT} {_CREDITED_IN.format(show="NEW.tmdb_id")};
+                END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_seen_in_movie_added
+                AFTER INSERT ON shows
+                WHEN NEW.type = 'movie' AND NEW.watched = 1
+                BEGIN
+                    {_SEEN_IN_RECOUNT} {_CREDITED_IN.format(show="NEW.tmdb_id")};
+                END
+            """))
+            # A new credit on an already-watched show counts once per (person, show)
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_seen_in_credit_added
+                AFTER INSERT ON person_credits
+                WHEN {_IS_WATCHED.format(show="NEW.show_tmdb_id")}
+                 AND NOT EXISTS (SELECT 1 FROM person_credits
+                                 WHERE person_tmdb_id = NEW.person_tmdb_id
+                                   AND show_tmdb_id = NEW.show_tmdb_id AND id != NEW.id)
+                BEGIN
+                    UPDATE people SET seen_in_count = COALESCE(seen_in_count, 0) + 1
+                    WHERE tmdb_id = NEW.person_tmdb_id;
+                END
+            """))
             conn.commit()
 
-        # Migration 13: create show_wikis table
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS show_wikis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                show_tmdb_id INTEGER NOT NULL,
-                label TEXT NOT NULL,
-                url TEXT NOT NULL,
-                season_url_template TEXT
-            )
-        """))
-        conn.execute(text(
-            "CREATE INDEX IF NOT EXISTS ix_show_wikis_show ON show_wikis (show_tmdb_id)"
-        ))
-        conn.commit()
+        if version < 18:
+            # Migration 18: denormalized shows.active_season — the highest season with a
+            # watched episode, where the schedule starts looking for the next episode.
+            # NULL means nothing watched yet. Kept current by triggers on episodes.
+            try:
+                conn.execute(text("SELECT active_season FROM shows LIMIT 1"))
+            except Exception:
+                conn.execute(text("ALTER TABLE shows ADD COLUMN active_season INTEGER"))
+            recompute = """
+                UPDATE shows SET active_season = (
+                    SELECT MAX(season_number) FROM episodes
+                    WHERE episodes.tmdb_show_id = shows.tmdb_id AND watched = 1
+                )
+            """
+            conn.execute(text(recompute))
 
-        # Migration 8: create episode_credits table
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS episode_credits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                person_tmdb_id INTEGER NOT NULL,
-                show_tmdb_id INTEGER NOT NULL,
-                season_number INTEGER NOT NULL,
-                episode_number INTEGER NOT NULL,
-                character TEXT,
-                UNIQUE(person_tmdb_id, show_tmdb_id, season_number, episode_number)
-            )
-        """))
-        conn.execute(text(
-            "CREATE INDEX IF NOT EXISTS ix_episode_credits_person ON episode_credits (person_tmdb_id)"
-        ))
-        conn.commit()
+            # Watching an episode can only raise the floor; unwatching may lower it
+            raise_floor = """
+                UPDATE shows SET active_season = MAX(COALESCE(active_season, 0), NEW.season_number)
+                WHERE tmdb_id = NEW.tmdb_show_id;
+            """
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_active_season_watched
+                AFTER UPDATE OF watched ON episodes
+                WHEN NEW.watched = 1 AND COALESCE(OLD.watched, 0) = 0
+                BEGIN
+                    {raise_floor}
+                END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_active_season_added
+                AFTER INSERT ON episodes
+                WHEN NEW.watched = 1
+                BEGIN
+                    {raise_floor}
+                END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_active_season_unwatched
+                AFTER UPDATE OF watched ON episodes
+                WHEN COALESCE(NEW.watched, 0) = 0 AND OLD.watched = 1
+                BEGIN
+                    {recompute} WHERE tmdb_id = NEW.tmdb_show_id;
+                END
+            """))
+            conn.commit()
+
+        if version < 19:
+            # Migration 19: TMDB show payload stored on the row, so tracked shows'
+            # detail pages survive container rebuilds (the disk cache isn't mounted)
+            for column, ddl in (("tmdb_json", "TEXT"), ("tmdb_synced_at", "VARCHAR")):
+                try:
+                    conn.execute(text(f"SELECT {column} FROM shows LIMIT 1"))
+                except Exception:
+                    conn.execute(text(f"ALTER TABLE shows ADD COLUMN {column} {ddl}"))
+            conn.commit()
+
+        if version < 20:
+            # Migration 20: schedule_version — a single counter bumped by triggers whenever
+            # a row /schedule/today reads actually changes, from the API or the importers.
+            # The schedule's response cache is keyed on it.
+            conn.execute(text("CREATE TABLE IF NOT EXISTS schedule_version (seq INTEGER NOT NULL)"))
+            conn.execute(text("""
+                INSERT INTO schedule_version (seq)
+                SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM schedule_version)
+            """))
+            bump = "UPDATE schedule_version SET seq = seq + 1;"
+            changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in (
+                "watched", "dismissed", "title", "air_date", "season_number", "episode_number",
+            ))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_schedule_episode_added
+                AFTER INSERT ON episodes
+                BEGIN {bump} END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_schedule_episode_changed
+                AFTER UPDATE ON episodes WHEN {changed}
+                BEGIN {bump} END
+            """))
+            changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in (
+                "user_status", "watch_pace", "last_watched_at", "title", "poster_path",
+                "active_season", "type",
+            ))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_schedule_show_added
+                AFTER INSERT ON shows
+                BEGIN {bump} END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_schedule_show_changed
+                AFTER UPDATE ON shows WHEN {changed}
+                BEGIN {bump} END
+            """))
+            conn.commit()
+
+        if version < 21:
+            # Migration 21: widen the progress index with the columns the progress
+            # query reads (dismissed, air_date, title), so it never touches the table
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_episodes_progress
+                    ON episodes (tmdb_show_id, watched, season_number, episode_number,
+                                 dismissed, air_date, title)
+            """))
+            conn.execute(text("DROP INDEX IF EXISTS ix_episodes_tmdb_watched_season_ep"))
+            conn.execute(text("ANALYZE episodes"))
+            conn.commit()
+
+        if version < 22:
+            # Migration 22: index for the library listing's order and keyset pages
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_shows_type_last_watched
+                    ON shows (type, last_watched_at DESC, id)
+            """))
+            conn.execute(text("ANALYZE shows"))
+            conn.commit()
+
+        if version < 23:
+            # Migration 23: re-run the migration 9 backfill for shows the Trakt
+            # importer added without a first_air_date once that backfill stopped
+            # running on every boot
+            conn.execute(text("""
+                UPDATE shows
+                SET first_air_date = (
+                    SELECT MIN(air_date) FROM episodes
+                    WHERE tmdb_show_id = shows.tmdb_id AND air_date IS NOT NULL
+                )
+                WHERE first_air_date IS NULL
+            """))
+            conn.commit()
 
+        if version < 24:
+            # Migration 24: rebuild the first-watched-episode trigger with NOT EXISTS
+            # in place of a per-row COUNT(*)
+            conn.execute(text("DROP TRIGGER IF EXISTS trg_seen_in_episode_watched"))
+            conn.execute(text(_SEEN_IN_EPISODE_WATCHED))
+            conn.commit()
+
+        if version < 25:
+            # Migration 25: people_version — the schedule_version counter for the cast and
+            # seen-in responses. Bumped on any change to what they embed: watch state
+            # (episodes and movies), show metadata, people, and stored cast or credits.
+            conn.execute(text("CREATE TABLE IF NOT EXISTS people_version (seq INTEGER NOT NULL)"))
+            conn.execute(text("""
+                INSERT INTO people_version (seq)
+                SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM people_version)
+            """))
+            bump = "UPDATE people_version SET seq = seq + 1;"
+            watched = {
+                "episodes": ("watched",),
+                "shows": ("watched", "watched_at", "title", "poster_path", "first_air_date", "type"),
+                "people": ("name", "profile_path", "birthday", "imdb_id", "seen_in_count"),
+            }
+            for table, columns in watched.items():
+                changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in columns)
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_people_version_{table}_changed
+                    AFTER UPDATE ON {table} WHEN {changed}
+                    BEGIN {bump} END
+                """))
+            for table in ("episodes", "shows", "people", "show_cast", "person_credits", "episode_credits"):
+                for event in ("INSERT", "DELETE"):
+                    conn.execute(text(f"""
+                        CREATE TRIGGER IF NOT EXISTS trg_people_version_{table}_{event.lower()}
+                        AFTER {event} ON {table}
+                        BEGIN {bump} END
+                    """))
+            for table in ("show_cast", "person_credits", "episode_credits"):
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_people_version_{table}_changed
+                    AFTER UPDATE ON {table}
+                    BEGIN {bump} END
+                """))
+            conn.commit()
+
+        conn.execute(text(f"PRAGMA user_version = {_SCHEMA_VERSION}"))
+        conn.commit()
 
 _run_migrations()
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    await tmdb.aclose()
+    checkpoint()
+
+
 app = FastAPI(
     title="WHIST — Where Have I Seen Them?",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, UniqueConstraint, desc
 from sqlalchemy.orm import relationship
 
 from backend.database import Base
@@ -11,6 +11,11 @@ def _utcnow() -> str:
 
 class Show(Base):
     __tablename__ = "shows"
+    __table_args__ = (
+        # Library listing and its keyset pages: last_watched_at DESC (NULLs sort
+        # last), then id, within a type
+        Index("ix_shows_type_last_watched", "type", desc("last_watched_at"), "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tmdb_id = Column(Integer, unique=True, nullable=False, index=True)
@@ -25,21 +30,35 @@ class Show(Base):
     first_air_date = Column(String)                   # YYYY-MM-DD from TMDB, or None
     watched = Column(Boolean, default=False)          # movies only: watched flag
     watched_at = Column(String)                       # movies only: ISO 8601 date
+    last_trakt_synced_at = Column(String)             # Trakt last_watched_at at the last import
+    active_season = Column(Integer)                   # highest season with a watched episode — trigger-maintained
+    tmdb_json = Column(String)                        # last TMDB /tv payload, served by the detail page
+    tmdb_synced_at = Column(String)                   # ISO 8601 UTC time tmdb_json was fetched
 
-    episodes = relationship("Episode", back_populates="show")
+    # Relationships never lazy-load: a per-row load inside a list endpoint is an
+    # N+1, so callers batch explicitly (IN() queries or selectinload) or get an error
+    episodes = relationship("Episode", back_populates="show", lazy="raise_on_sql")
 
 
 class Episode(Base):
     __tablename__ = "episodes"
     __table_args__ = (
+        # Also serves plain tmdb_show_id lookups via its leading column
         UniqueConstraint("tmdb_show_id", "season_number", "episode_number"),
         # Composite index for the "seen in" subquery: WHERE watched=1 → tmdb_show_id
         Index("ix_episodes_watched_tmdb", "watched", "tmdb_show_id"),
+        # Covering index for progress / next-unwatched: per show, by watched, in episode
+        # order, carrying every column the progress query reads so it skips the table
+        Index("ix_episodes_progress",
+              "tmdb_show_id", "watched", "season_number", "episode_number",
+              "dismissed", "air_date", "title"),
+        # Aired-and-unwatched probes in the schedule: per show, by watched, then air date
+        Index("ix_episodes_tmdb_watched_air", "tmdb_show_id", "watched", "air_date"),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     show_id = Column(Integer, ForeignKey("shows.id"), nullable=False)
-    tmdb_show_id = Column(Integer, nullable=False, index=True)
+    tmdb_show_id = Column(Integer, nullable=False)
     season_number = Column(Integer, nullable=False)
     episode_number = Column(Integer, nullable=False)
     title = Column(String)
@@ -48,7 +67,7 @@ class Episode(Base):
     watched_at = Column(String)
     dismissed = Column(Boolean, default=False, nullable=False)
 
-    show = relationship("Show", back_populates="episodes")
+    show = relationship("Show", back_populates="episodes", lazy="raise_on_sql")
 
 
 class Person(Base):
@@ -61,8 +80,9 @@ class Person(Base):
     birthday = Column(String)                 # YYYY-MM-DD, nullable
     imdb_id = Column(String)
     credits_cached_at = Column(String)
+    seen_in_count = Column(Integer, default=0)  # distinct watched shows credited in — trigger-maintained
 
-    credits = relationship("PersonCredit", back_populates="person")
+    credits = relationship("PersonCredit", back_populates="person", lazy="raise_on_sql")
 
 
 class PersonCredit(Base):
@@ -80,7 +100,7 @@ class PersonCredit(Base):
     type = Column(String, nullable=False)         # tv | movie
     first_air_date = Column(String)               # YYYY-MM-DD or None
 
-    person = relationship("Person", back_populates="credits")
+    person = relationship("Person", back_populates="credits", lazy="raise_on_sql")
 
 
 class WatchHistory(Base):
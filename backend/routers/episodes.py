@@ -1,8 +1,11 @@
-from datetime import date, datetime, timezone
+import asyncio
+from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+import orjson
 from pydantic import BaseModel
-from sqlalchemy import delete, func, select
+from sqlalchemy import String, bindparam, case, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
@@ -12,85 +15,206 @@ from backend import models, tmdb
 router = APIRouter(tags=["episodes"])
 
 
-async def _cache_season(show: models.Show, season_number: int, db: Session) -> None:
-    """Fetch a season from TMDB and upsert any missing episodes. Always runs (no skip)."""
+# Hot per-request statements, built once at import so handlers only bind parameters
+_SHOW_BY_TMDB_ID = select(models.Show).where(models.Show.tmdb_id == bindparam("tmdb_id"))
+
+_EPISODE_BY_KEY = select(models.Episode).where(
+    models.Episode.tmdb_show_id == bindparam("tmdb_show_id"),
+    models.Episode.season_number == bindparam("season_number"),
+    models.Episode.episode_number == bindparam("episode_number"),
+)
+
+_WATCH_COUNT = select(func.count()).select_from(models.WatchHistory).where(
+    models.WatchHistory.tmdb_show_id == bindparam("tmdb_show_id"),
+    models.WatchHistory.season_number == bindparam("season_number"),
+    models.WatchHistory.episode_number == bindparam("episode_number"),
+)
+
+_EPISODE_LIST = (
+    select(
+        models.Episode.id,
+        models.Episode.season_number,
+        models.Episode.episode_number,
+        models.Episode.title,
+        models.Episode.air_date,
+        models.Episode.watched,
+        models.Episode.watched_at,
+    )
+    .where(models.Episode.tmdb_show_id == bindparam("tmdb_show_id"))
+    .order_by(models.Episode.season_number, models.Episode.episode_number)
+)
+
+# One pass: window totals over the whole show, ordered so the first
+# unwatched episode (if any) is the row that comes back.
+_PROGRESS = (
+    select(
+        models.Episode.season_number,
+        models.Episode.episode_number,
+        models.Episode.title,
+        models.Episode.watched,
+        func.count().over().label("total"),
+        func.sum(case((models.Episode.watched == True, 1), else_=0)).over().label("watched_count"),  # noqa: E712
+    )
+    .where(models.Episode.tmdb_show_id == bindparam("tmdb_show_id"))
+    .order_by(
+        models.Episode.watched,
+        models.Episode.season_number,
+        models.Episode.episode_number,
+    )
+    .limit(1)
+)
+
+
+# Max in-flight TMDB season requests when caching a whole show
+_SEASON_FETCH_CONCURRENCY = 4
+
+
+async def _cache_season(
+    show: models.Show, season_number: int, db: Session, force: bool = False
+) -> None:
+    """Fetch a season from TMDB and upsert any missing episodes. Always runs (no skip).
+
+    Pass force=True to bypass the TMDB response cache.
+    """
     try:
-        season_data = await tmdb.get_season(show.tmdb_id, season_number)
+        season_data = await tmdb.get_season(show.tmdb_id, season_number, force=force)
     except Exception:
         return
-    for ep in season_data.get("episodes", []):
-        ep_num = ep.get("episode_number")
-        if ep_num is None:
-            continue
-        exists = db.execute(
-            select(models.Episode).where(
-                models.Episode.tmdb_show_id == show.tmdb_id,
-                models.Episode.season_number == season_number,
-                models.Episode.episode_number == ep_num,
-            )
-        ).scalar_one_or_none()
-        if not exists:
-            db.add(models.Episode(
-                show_id=show.id,
-                tmdb_show_id=show.tmdb_id,
-                season_number=season_number,
-                episode_number=ep_num,
-                title=ep.get("name"),
-                air_date=ep.get("air_date"),
-                watched=False,
-            ))
-        else:
-            exists.title = ep.get("name")
-            exists.air_date = ep.get("air_date")
+    rows = _episode_rows(show, season_number, season_data)
+    if rows:
+        # Upsert on the (show, season, episode) key: new episodes are inserted,
+        # known ones get fresh metadata, watch state is left alone
+        stmt = sqlite_insert(models.Episode)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["tmdb_show_id", "season_number", "episode_number"],
+                set_={"title": stmt.excluded.title, "air_date": stmt.excluded.air_date},
+            ),
+            rows,
+        )
     db.commit()
 
 
+def _episode_rows(show: models.Show, season_number: int, season_data: dict) -> list[dict]:
+    """Episode insert parameters for a TMDB season payload."""
+    return [
+        {
+            "show_id": show.id,
+            "tmdb_show_id": show.tmdb_id,
+            "season_number": season_number,
+            "episode_number": ep["episode_number"],
+            "title": ep.get("name"),
+            "air_date": ep.get("air_date"),
+            "watched": False,
+        }
+        for ep in season_data.get("episodes", [])
+        if ep.get("episode_number") is not None
+    ]
+
+
+def _ensure_season_cached(
+    show: models.Show, season_number: int, season_data: dict, db: Session
+) -> None:
+    """Insert a season's episodes from an already-fetched TMDB payload if none are cached."""
+    cached = db.execute(
+        select(models.Episode.id).where(
+            models.Episode.tmdb_show_id == show.tmdb_id,
+            models.Episode.season_number == season_number,
+        ).limit(1)
+    ).first()
+    if cached:
+        return
+    rows = _episode_rows(show, season_number, season_data)
+    if rows:
+        db.execute(sqlite_insert(models.Episode).on_conflict_do_nothing(), rows)
+        db.commit()
+
+
 async def _ensure_episodes_cached(show: models.Show, db: Session) -> None:
-    """Fetch and cache all non-special seasons from TMDB if not yet cached."""
-    count = db.execute(
-        select(func.count()).select_from(models.Episode)
+    """Fetch and cache any non-special seasons from TMDB not yet cached.
+
+    Seasons can be cached one at a time (opening a season page), so a show with
+    some episodes cached may still be missing whole seasons.
+    """
+    cached = set(db.execute(
+        select(models.Episode.season_number).distinct()
         .where(models.Episode.tmdb_show_id == show.tmdb_id)
-    ).scalar()
-    if count > 0:
+    ).scalars())
+
+    try:
+        details = await tmdb.get_show(show.tmdb_id)
+    except Exception:
+        if cached:
+            return  # serve what's cached; the missing seasons are picked up next time
+        raise
+    season_nums = [
+        s["season_number"] for s in details.get("seasons", [])
+        if s["season_number"] != 0  # skip specials
+        and s["season_number"] not in cached
+    ]
+    if not season_nums:
         return
 
-    details = await tmdb.get_show(show.tmdb_id)
-    for season in details.get("seasons", []):
-        season_num = season["season_number"]
-        if season_num == 0:  # skip specials
+    # Fetch all seasons concurrently, capped to stay under TMDB's rate limit
+    sem = asyncio.Semaphore(_SEASON_FETCH_CONCURRENCY)
+
+    async def fetch(season_num: int) -> dict:
+        async with sem:
+            return await tmdb.get_season(show.tmdb_id, season_num)
+
+    results = await asyncio.gather(
+        *[fetch(n) for n in season_nums],
+        return_exceptions=True,
+    )
+
+    rows = []
+    for season_num, season_data in zip(season_nums, results):
+        if isinstance(season_data, Exception):
             continue
-        await _cache_season(show, season_num, db)
+        rows.extend(_episode_rows(show, season_num, season_data))
+
+    # Only uncached seasons were fetched, so every row is new — one multi-row
+    # INSERT instead of a SELECT per episode. ON CONFLICT keeps it idempotent
+    # against the unique key. Runs in a worker thread so a large show doesn't
+    # stall the event loop.
+    def write() -> None:
+        if rows:
+            db.execute(sqlite_insert(models.Episode).on_conflict_do_nothing(), rows)
+        db.commit()
+
+    await asyncio.to_thread(write)
 
 
 @router.get("/shows/{tmdb_show_id}/episodes")
 async def get_show_episodes(tmdb_show_id: int, db: Session = Depends(get_db)):
     """Get all episodes for a show, fetching from TMDB if not yet cached."""
-    show = db.execute(
-        select(models.Show).where(models.Show.tmdb_id == tmdb_show_id)
-    ).scalar_one_or_none()
+    show = db.execute(_SHOW_BY_TMDB_ID, {"tmdb_id": tmdb_show_id}).scalar_one_or_none()
     if not show:
         raise HTTPException(status_code=404, detail="Show not tracked")
 
     await _ensure_episodes_cached(show, db)
 
-    episodes = db.execute(
-        select(models.Episode)
-        .where(models.Episode.tmdb_show_id == tmdb_show_id)
-        .order_by(models.Episode.season_number, models.Episode.episode_number)
-    ).scalars().all()
+    rows = await asyncio.to_thread(
+        lambda: db.execute(_EPISODE_LIST, {"tmdb_show_id": tmdb_show_id}).all()
+    )
 
-    return [
-        {
-            "id": ep.id,
-            "season_number": ep.season_number,
-            "episode_number": ep.episode_number,
-            "title": ep.title,
-            "air_date": ep.air_date,
-            "watched": ep.watched,
-            "watched_at": ep.watched_at,
-        }
-        for ep in episodes
-    ]
+    # Plain column tuples serialized straight to bytes — skips ORM hydration
+    # and FastAPI's jsonable_encoder pass over hundreds of rows.
+    return Response(
+        orjson.dumps([
+            {
+                "id": ep_id,
+                "season_number": season_number,
+                "episode_number": episode_number,
+                "title": title,
+                "air_date": air_date,
+                "watched": watched,
+                "watched_at": watched_at,
+            }
+            for ep_id, season_number, episode_number, title, air_date, watched, watched_at in rows
+        ]),
+        media_type="application/json",
+    )
 
 
 @router.get("/shows/{tmdb_show_id}/season/{season_number}")
@@ -101,44 +225,47 @@ async def get_season_detail(
     Season detail: TMDB metadata + episode list with local watch state.
     Requires the show to be tracked.
     """
-    show = db.execute(
-        select(models.Show).where(models.Show.tmdb_id == tmdb_show_id)
-    ).scalar_one_or_none()
+    show = db.execute(_SHOW_BY_TMDB_ID, {"tmdb_id": tmdb_show_id}).scalar_one_or_none()
     if not show:
         raise HTTPException(status_code=404, detail="Show not tracked")
 
-    await _ensure_episodes_cached(show, db)
-
     try:
         season_data = await tmdb.get_season(tmdb_show_id, season_number)
     except Exception:
         raise HTTPException(status_code=502, detail="Failed to fetch season from TMDB")
 
-    # Merge TMDB episode metadata with local watch state
-    episodes_db = {
-        ep.episode_number: ep
-        for ep in db.execute(
-            select(models.Episode).where(
-                models.Episode.tmdb_show_id == tmdb_show_id,
-                models.Episode.season_number == season_number,
+    def load_local() -> tuple[dict, dict]:
+        # Only this season's rows are needed here — don't fan out to the whole show
+        _ensure_season_cached(show, season_number, season_data, db)
+
+        # Merge TMDB episode metadata with local watch state
+        episodes_db = {
+            ep.episode_number: ep
+            for ep in db.execute(
+                select(models.Episode).where(
+                    models.Episode.tmdb_show_id == tmdb_show_id,
+                    models.Episode.season_number == season_number,
+                )
+            ).scalars().all()
+        }
+
+        # Pull watch counts and most-recent dates from watch_history
+        history_rows = db.execute(
+            select(
+                models.WatchHistory.episode_number,
+                func.count().label("watch_count"),
+                func.max(models.WatchHistory.watched_at).label("last_watched_at"),
             )
-        ).scalars().all()
-    }
+            .where(
+                models.WatchHistory.tmdb_show_id == tmdb_show_id,
+                models.WatchHistory.season_number == season_number,
+            )
+            .group_by(models.WatchHistory.episode_number)
+        ).all()
+        return episodes_db, {r.episode_number: r for r in history_rows}
 
-    # Pull watch counts and most-recent dates from watch_history
-    history_rows = db.execute(
-        select(
-            models.WatchHistory.episode_number,
-            func.count().label("watch_count"),
-            func.max(models.WatchHistory.watched_at).label("last_watched_at"),
-        )
-        .where(
-            models.WatchHistory.tmdb_show_id == tmdb_show_id,
-            models.WatchHistory.season_number == season_number,
-        )
-        .group_by(models.WatchHistory.episode_number)
-    ).all()
-    history_map = {r.episode_number: r for r in history_rows}
+    # Blocking sqlite work goes to a worker thread; the TMDB await above stays on the loop
+    episodes_db, history_map = await asyncio.to_thread(load_local)
 
     episodes = []
     for ep in season_data.get("episodes", []):
@@ -168,36 +295,17 @@ async def get_season_detail(
 
 
 @router.get("/shows/{tmdb_show_id}/progress")
-async def get_show_progress(tmdb_show_id: int, db: Session = Depends(get_db)):
+def get_show_progress(tmdb_show_id: int, db: Session = Depends(get_db)):
     """Get watch progress summary for a show."""
-    show = db.execute(
-        select(models.Show).where(models.Show.tmdb_id == tmdb_show_id)
-    ).scalar_one_or_none()
+    show = db.execute(_SHOW_BY_TMDB_ID, {"tmdb_id": tmdb_show_id}).scalar_one_or_none()
     if not show:
         raise HTTPException(status_code=404, detail="Show not tracked")
 
-    total = db.execute(
-        select(func.count()).select_from(models.Episode)
-        .where(models.Episode.tmdb_show_id == tmdb_show_id)
-    ).scalar()
-
-    watched = db.execute(
-        select(func.count()).select_from(models.Episode)
-        .where(
-            models.Episode.tmdb_show_id == tmdb_show_id,
-            models.Episode.watched == True,  # noqa: E712
-        )
-    ).scalar()
+    row = db.execute(_PROGRESS, {"tmdb_show_id": tmdb_show_id}).one_or_none()
 
-    next_ep = db.execute(
-        select(models.Episode)
-        .where(
-            models.Episode.tmdb_show_id == tmdb_show_id,
-            models.Episode.watched == False,  # noqa: E712
-        )
-        .order_by(models.Episode.season_number, models.Episode.episode_number)
-        .limit(1)
-    ).scalar_one_or_none()
+    total = row.total if row else 0
+    watched = row.watched_count if row else 0
+    next_ep = row if row and not row.watched else None
 
     return {
         "tmdb_show_id": tmdb_show_id,
@@ -212,6 +320,65 @@ async def get_show_progress(tmdb_show_id: int, db: Session = Depends(get_db)):
     }
 
 
+def progress_for_shows(tmdb_ids: list[int], db: Session, *criteria, floors=None) -> dict[int, dict]:
+    """Batched progress for many shows in one query instead of a few per show.
+
+    Returns {tmdb_show_id: {"total", "watched", "next_unwatched"}}, where
+    next_unwatched is a row (season_number, episode_number, title, air_date) or
+    None. Extra `criteria` narrow the episodes considered. `floors`, a subquery
+    of (tmdb_show_id, floor), limits each show to seasons >= its floor (shows
+    absent from it start at season 1). Shows with no matching episodes are
+    absent from the result.
+    """
+    if not tmdb_ids:
+        return {}
+    where = [models.Episode.tmdb_show_id.in_(tmdb_ids), *criteria]
+
+    def from_episodes(*columns):
+        q = select(*columns).select_from(models.Episode)
+        if floors is not None:
+            q = q.outerjoin(floors, floors.c.tmdb_show_id == models.Episode.tmdb_show_id).where(
+                models.Episode.season_number >= func.coalesce(floors.c.floor, 1)
+            )
+        return q
+
+    # One pass: per-show window totals, plus a ROW_NUMBER() that puts unwatched
+    # episodes first in episode order — so rn = 1 is the next episode to watch
+    # (or a watched one when the show is done). Same shape as _PROGRESS.
+    partition = models.Episode.tmdb_show_id
+    ranked = (
+        from_episodes(
+            models.Episode.tmdb_show_id,
+            models.Episode.season_number,
+            models.Episode.episode_number,
+            models.Episode.title,
+            models.Episode.air_date,
+            models.Episode.watched,
+            func.count().over(partition_by=partition).label("total"),
+            func.sum(case((models.Episode.watched == True, 1), else_=0))  # noqa: E712
+            .over(partition_by=partition).label("watched_count"),
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(
+                    models.Episode.watched,
+                    models.Episode.season_number,
+                    models.Episode.episode_number,
+                ),
+            ).label("rn"),
+        )
+        .where(*where)
+        .subquery()
+    )
+    return {
+        row.tmdb_show_id: {
+            "total": row.total,
+            "watched": row.watched_count or 0,
+            "next_unwatched": None if row.watched else row,
+        }
+        for row in db.execute(select(ranked).where(ranked.c.rn == 1))
+    }
+
+
 @router.get("/shows/{tmdb_show_id}/season-progress")
 def get_season_progress(tmdb_show_id: int, db: Session = Depends(get_db)):
     """Per-season episode progress for a show.
@@ -249,8 +416,15 @@ def get_season_progress(tmdb_show_id: int, db: Session = Depends(get_db)):
 
 # --- Schemas ---
 
+# ISO string for the current day, re-formatted only when the date rolls over
+_TODAY_CACHE: dict = {"day": None, "iso": None}
+
+
 def _today() -> str:
-    return date.today().isoformat()
+    d = date.today()
+    if _TODAY_CACHE["day"] != d:
+        _TODAY_CACHE.update(day=d, iso=d.isoformat())
+    return _TODAY_CACHE["iso"]
 
 
 class WatchedRequest(BaseModel):
@@ -271,7 +445,7 @@ class BulkWatchedRequest(BaseModel):
 def _resolve_date(watched_at: str | None) -> str | None:
     """Resolve the watched_at field to a YYYY-MM-DD string or None."""
     if watched_at == "today":
-        return date.today().isoformat()
+        return _today()
     return watched_at  # either a YYYY-MM-DD string or None
 
 
@@ -284,21 +458,17 @@ async def mark_episode_watched(body: WatchedRequest, db: Session = Depends(get_d
     watched=True: insert a new watch_history entry (always appends — supports rewatches).
     watched=False: delete all watch_history entries for this episode and clear the episode.
     """
-    show = db.execute(
-        select(models.Show).where(models.Show.tmdb_id == body.tmdb_show_id)
-    ).scalar_one_or_none()
+    show = db.execute(_SHOW_BY_TMDB_ID, {"tmdb_id": body.tmdb_show_id}).scalar_one_or_none()
     if not show:
         raise HTTPException(status_code=404, detail="Show not tracked")
 
     await _cache_season(show, body.season_number, db)
 
-    ep = db.execute(
-        select(models.Episode).where(
-            models.Episode.tmdb_show_id == body.tmdb_show_id,
-            models.Episode.season_number == body.season_number,
-            models.Episode.episode_number == body.episode_number,
-        )
-    ).scalar_one_or_none()
+    ep = db.execute(_EPISODE_BY_KEY, {
+        "tmdb_show_id": body.tmdb_show_id,
+        "season_number": body.season_number,
+        "episode_number": body.episode_number,
+    }).scalar_one_or_none()
     if not ep:
         raise HTTPException(status_code=404, detail="Episode not found")
 
@@ -316,7 +486,7 @@ async def mark_episode_watched(body: WatchedRequest, db: Session = Depends(get_d
             ep.watched_at = resolved
         show = db.get(models.Show, ep.show_id)
         if show:
-            show.last_watched_at = datetime.now(timezone.utc).isoformat()
+            show.last_watched_at = models._utcnow()
     else:
         db.execute(
             delete(models.WatchHistory).where(
@@ -330,13 +500,11 @@ async def mark_episode_watched(body: WatchedRequest, db: Session = Depends(get_d
 
     db.commit()
 
-    watch_count = db.execute(
-        select(func.count()).select_from(models.WatchHistory).where(
-            models.WatchHistory.tmdb_show_id == body.tmdb_show_id,
-            models.WatchHistory.season_number == body.season_number,
-            models.WatchHistory.episode_number == body.episode_number,
-        )
-    ).scalar()
+    watch_count = db.execute(_WATCH_COUNT, {
+        "tmdb_show_id": body.tmdb_show_id,
+        "season_number": body.season_number,
+        "episode_number": body.episode_number,
+    }).scalar()
     return {"watched": ep.watched, "watched_at": ep.watched_at, "watch_count": watch_count}
 
 
@@ -352,50 +520,52 @@ def mark_bulk_watched(body: BulkWatchedRequest, db: Session = Depends(get_db)):
             del_q = del_q.where(models.WatchHistory.season_number == body.season_number)
         db.execute(del_q)
 
-        ep_q = select(models.Episode).where(
+        ep_q = update(models.Episode).where(
             models.Episode.tmdb_show_id == body.tmdb_show_id,
             models.Episode.watched == True,  # noqa: E712
         )
         if body.season_number is not None:
             ep_q = ep_q.where(models.Episode.season_number == body.season_number)
-        episodes = db.execute(ep_q).scalars().all()
-        for ep in episodes:
-            ep.watched = False
-            ep.watched_at = None
+        result = db.execute(ep_q.values(watched=False, watched_at=None))
 
         db.commit()
-        return {"marked": len(episodes)}
+        return {"marked": result.rowcount}
 
-    query = select(models.Episode).where(
+    unwatched = [
         models.Episode.tmdb_show_id == body.tmdb_show_id,
         models.Episode.watched == False,  # noqa: E712
-    )
+    ]
     if body.season_number is not None:
-        query = query.where(models.Episode.season_number == body.season_number)
-
-    episodes = db.execute(query).scalars().all()
-    if not episodes:
-        return {"marked": 0}
+        unwatched.append(models.Episode.season_number == body.season_number)
 
     resolved_date = _resolve_date(body.watched_at)
-    for ep in episodes:
-        ep.watched = True
-        ep.watched_at = resolved_date
-        db.add(models.WatchHistory(
-            tmdb_show_id=body.tmdb_show_id,
-            season_number=ep.season_number,
-            episode_number=ep.episode_number,
-            watched_at=resolved_date,
-        ))
 
-    show = db.execute(
-        select(models.Show).where(models.Show.tmdb_id == body.tmdb_show_id)
-    ).scalar_one_or_none()
+    # Append history rows and flip the episodes server-side — no rows loaded into Python
+    db.execute(
+        insert(models.WatchHistory).from_select(
+            ["tmdb_show_id", "season_number", "episode_number", "watched_at"],
+            select(
+                models.Episode.tmdb_show_id,
+                models.Episode.season_number,
+                models.Episode.episode_number,
+                literal(resolved_date, String),
+            ).where(*unwatched),
+        )
+    )
+    result = db.execute(
+        update(models.Episode)
+        .where(*unwatched)
+        .values(watched=True, watched_at=resolved_date)
+    )
+    if result.rowcount == 0:
+        return {"marked": 0}
+
+    show = db.execute(_SHOW_BY_TMDB_ID, {"tmdb_id": body.tmdb_show_id}).scalar_one_or_none()
     if show:
-        show.last_watched_at = datetime.now(timezone.utc).isoformat()
+        show.last_watched_at = models._utcnow()
 
     db.commit()
-    return {"marked": len(episodes)}
+    return {"marked": result.rowcount}
 
 
 @router.get("/shows/{tmdb_show_id}/season/{season_number}/episode/{episode_number}/watch-history")
@@ -435,13 +605,11 @@ def delete_history_entry(entry_id: int, db: Session = Depends(get_db)):
     db.flush()
 
     # Re-sync the episode row
-    ep = db.execute(
-        select(models.Episode).where(
-            models.Episode.tmdb_show_id == tmdb_show_id,
-            models.Episode.season_number == season_number,
-            models.Episode.episode_number == episode_number,
-        )
-    ).scalar_one_or_none()
+    ep = db.execute(_EPISODE_BY_KEY, {
+        "tmdb_show_id": tmdb_show_id,
+        "season_number": season_number,
+        "episode_number": episode_number,
+    }).scalar_one_or_none()
 
     if ep:
         remaining = db.execute(
@@ -464,13 +632,11 @@ def delete_history_entry(entry_id: int, db: Session = Depends(get_db)):
 
     db.commit()
 
-    watch_count = db.execute(
-        select(func.count()).select_from(models.WatchHistory).where(
-            models.WatchHistory.tmdb_show_id == tmdb_show_id,
-            models.WatchHistory.season_number == season_number,
-            models.WatchHistory.episode_number == episode_number,
-        )
-    ).scalar()
+    watch_count = db.execute(_WATCH_COUNT, {
+        "tmdb_show_id": tmdb_show_id,
+        "season_number": season_number,
+        "episode_number": episode_number,
+    }).scalar()
     return {"deleted": True, "watch_count": watch_count, "watched": ep.watched if ep else False}
 
 
@@ -480,13 +646,11 @@ def dismiss_episode(
     db: Session = Depends(get_db),
 ):
     """Mark an episode dismissed — excluded from the schedule without affecting watch history."""
-    ep = db.execute(
-        select(models.Episode).where(
-            models.Episode.tmdb_show_id == tmdb_show_id,
-            models.Episode.season_number == season_number,
-            models.Episode.episode_number == episode_number,
-        )
-    ).scalar_one_or_none()
+    ep = db.execute(_EPISODE_BY_KEY, {
+        "tmdb_show_id": tmdb_show_id,
+        "season_number": season_number,
+        "episode_number": episode_number,
+    }).scalar_one_or_none()
     if not ep:
         raise HTTPException(status_code=404, detail="Episode not found")
     ep.dismissed = True
@@ -500,13 +664,11 @@ def undismiss_episode(
     db: Session = Depends(get_db),
 ):
     """Clear the dismissed flag on an episode."""
-    ep = db.execute(
-        select(models.Episode).where(
-            models.Episode.tmdb_show_id == tmdb_show_id,
-            models.Episode.season_number == season_number,
-            models.Episode.episode_number == episode_number,
-        )
-    ).scalar_one_or_none()
+    ep = db.execute(_EPISODE_BY_KEY, {
+        "tmdb_show_id": tmdb_show_id,
+        "season_number": season_number,
+        "episode_number": episode_number,
+    }).scalar_one_or_none()
     if not ep:
         raise HTTPException(status_code=404, detail="Episode not found")
     ep.dismissed = False
@@ -520,12 +682,13 @@ async def refresh_all_episodes(db: Session = Depends(get_db)):
 
     Safe to run multiple times — only inserts missing episodes.
     Use this to fix shows imported from Trakt that have partial episode data.
+    Bypasses the TMDB response cache so the data is always fresh.
     """
-    shows = db.execute(select(models.Show).where(models.Show.type == "tv")).scalars().all()
+    shows = db.execute(select(models.Show).where(models.Show.type == "tv").order_by(models.Show.id)).scalars().all()
     results = []
     for show in shows:
         try:
-            details = await tmdb.get_show(show.tmdb_id)
+            details = await tmdb.get_show(show.tmdb_id, force=True)
         except Exception as e:
             results.append({"tmdb_id": show.tmdb_id, "title": show.title, "error": str(e)})
             continue
@@ -533,7 +696,7 @@ async def refresh_all_episodes(db: Session = Depends(get_db)):
         for season in details.get("seasons", []):
             if season["season_number"] == 0:
                 continue
-            await _cache_season(show, season["season_number"], db)
+            await _cache_season(show, season["season_number"], db, force=True)
             seasons_refreshed += 1
         results.append({"tmdb_id": show.tmdb_id, "title": show.title, "seasons": seasons_refreshed})
     return {"shows": len(shows), "results": results}
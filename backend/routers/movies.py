@@ -11,49 +11,6 @@ from backend import models, tmdb
 router = APIRouter(prefix="/movies", tags=["movies"])
 
 
-async def _ensure_movie_cast_cached(movie: models.Show, db: Session) -> None:
-    """Fetch and cache movie cast from TMDB if not yet cached."""
-    from sqlalchemy import func
-    count = db.execute(
-        select(func.count()).select_from(models.ShowCast)
-        .where(models.ShowCast.show_tmdb_id == movie.tmdb_id)
-    ).scalar()
-    if count > 0:
-        return
-
-    data = await tmdb.get_movie_credits(movie.tmdb_id)
-    for member in data.get("cast", []):
-        person_id = member.get("id")
-        if not person_id:
-            continue
-
-        person = db.execute(
-            select(models.Person).where(models.Person.tmdb_id == person_id)
-        ).scalar_one_or_none()
-        if not person:
-            db.add(models.Person(
-                tmdb_id=person_id,
-                name=member.get("name", "Unknown"),
-                profile_path=member.get("profile_path"),
-            ))
-
-        exists = db.execute(
-            select(models.ShowCast).where(
-                models.ShowCast.show_tmdb_id == movie.tmdb_id,
-                models.ShowCast.person_tmdb_id == person_id,
-            )
-        ).scalar_one_or_none()
-        if not exists:
-            db.add(models.ShowCast(
-                show_tmdb_id=movie.tmdb_id,
-                person_tmdb_id=person_id,
-                character=member.get("character", ""),
-                order=member.get("order", 999),
-            ))
-
-    db.commit()
-
-
 class MovieAddRequest(BaseModel):
     tmdb_id: int
     user_status: str = "watchlist"  # watchlist | finished | abandoned
@@ -108,7 +65,7 @@ async def add_movie(body: MovieAddRequest, db: Session = Depends(get_db)):
         poster_path=details.get("poster_path"),
         user_status=body.user_status,
         type="movie",
-        added_at=datetime.now(timezone.utc).isoformat(),
+        added_at=models._utcnow(),
         first_air_date=details.get("release_date"),
         watched=False,
     )
@@ -203,7 +160,7 @@ def update_movie_status(tmdb_id: int, body: MovieStatusRequest, db: Session = De
 @router.get("/{tmdb_id}/cast")
 async def get_movie_cast(tmdb_id: int, db: Session = Depends(get_db)):
     """Get cast for a movie, fetching from TMDB if not yet cached."""
-    from backend.routers.people import _seen_in_counts
+    from backend.routers.people import _ensure_cast_cached, _seen_in_counts
 
     movie = db.execute(
         select(models.Show).where(models.Show.tmdb_id == tmdb_id, models.Show.type == "movie")
@@ -211,7 +168,7 @@ async def get_movie_cast(tmdb_id: int, db: Session = Depends(get_db)):
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not tracked")
 
-    await _ensure_movie_cast_cached(movie, db)
+    await _ensure_cast_cached(movie, db)
 
     rows = db.execute(
         select(models.ShowCast, models.Person)
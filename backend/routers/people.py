@@ -1,8 +1,11 @@
 import asyncio
-from datetime import date, datetime, timezone
+import time
+from datetime import date
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy import and_, func, select, union
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+import orjson
+from sqlalchemy import and_, case, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from backend.database import SessionLocal, get_db
@@ -10,6 +13,50 @@ from backend import models, tmdb
 
 router = APIRouter(tags=["people"])
 
+# Finished cast / seen-in responses as JSON bytes, keyed per endpoint and id.
+# Entries are only served while the data version they were built from is current.
+_RESPONSE_TTL = 600  # seconds
+_RESPONSE_CACHE_MAX = 256
+_response_cache: dict[tuple, tuple[float, int, bytes]] = {}
+
+
+def _json(body: bytes) -> Response:
+    return Response(body, media_type="application/json")
+
+
+_PEOPLE_VERSION = text("SELECT seq FROM people_version")
+
+
+def _data_version(db: Session) -> int:
+    """Counter bumped by triggers on everything the cached responses are built from.
+
+    Watch state (episodes and movies), show metadata, people and stored cast or
+    credits — including writes from the Trakt importers, which run in a
+    separate process. See migration 25.
+    """
+    return db.execute(_PEOPLE_VERSION).scalar()
+
+
+def _cached_response(key: tuple, version: int) -> Response | None:
+    """Return the cached response for key if fresh and built from `version`."""
+    entry = _response_cache.get(key)
+    if entry and entry[0] > time.monotonic() and entry[1] == version:
+        return _json(entry[2])
+    return None
+
+
+def _store_response(key: tuple, db: Session, content) -> Response:
+    """Serialize with orjson and cache against the data version after the handler's writes."""
+    return _store_body(key, db, orjson.dumps(content))
+
+
+def _store_body(key: tuple, db: Session, body: bytes) -> Response:
+    """Cache an already-serialized JSON body against the current data version."""
+    if key not in _response_cache and len(_response_cache) >= _RESPONSE_CACHE_MAX:
+        _response_cache.pop(next(iter(_response_cache)))  # oldest first
+    _response_cache[key] = (time.monotonic() + _RESPONSE_TTL, _data_version(db), body)
+    return _json(body)
+
 
 def _age_at(birthday: str | None, event_date: str | None) -> int | None:
     """Floor years between birthday and event_date (both YYYY-MM-DD strings)."""
@@ -26,48 +73,77 @@ def _age_at(birthday: str | None, event_date: str | None) -> int | None:
         return None
 
 
+# Shows whose cast is known to be stored. Cast rows are never deleted, so
+# once a show is in here the DB check can be skipped for the process lifetime.
+_cast_cached: set[int] = set()
+
+
 async def _ensure_cast_cached(show: models.Show, db: Session) -> None:
-    """Fetch and cache show cast from TMDB if not yet cached."""
-    count = db.execute(
-        select(func.count()).select_from(models.ShowCast)
+    """Fetch and cache show (or movie) cast from TMDB if not yet cached."""
+    if show.tmdb_id in _cast_cached:
+        return
+    if db.execute(
+        select(models.ShowCast.id)
         .where(models.ShowCast.show_tmdb_id == show.tmdb_id)
-    ).scalar()
-    if count > 0:
+        .limit(1)
+    ).first():
+        _cast_cached.add(show.tmdb_id)
         return
 
-    data = await tmdb.get_show_credits(show.tmdb_id)
+    if show.type == "movie":
+        data = await tmdb.get_movie_credits(show.tmdb_id)
+    else:
+        data = await tmdb.get_show_credits(show.tmdb_id)
+    # First credit per person wins, as with the old row-at-a-time upsert
+    people, cast = {}, {}
     for member in data.get("cast", []):
         person_id = member.get("id")
-        if not person_id:
+        if not person_id or person_id in people:
             continue
+        people[person_id] = {
+            "tmdb_id": person_id,
+            "name": member.get("name", "Unknown"),
+            "profile_path": member.get("profile_path"),
+        }
+        cast[person_id] = {
+            "show_tmdb_id": show.tmdb_id,
+            "person_tmdb_id": person_id,
+            "character": member.get("character", ""),
+            "order": member.get("order", 999),
+        }
 
-        # Upsert person
-        person = db.execute(
-            select(models.Person).where(models.Person.tmdb_id == person_id)
-        ).scalar_one_or_none()
-        if not person:
-            db.add(models.Person(
-                tmdb_id=person_id,
-                name=member.get("name", "Unknown"),
-                profile_path=member.get("profile_path"),
-            ))
+    if people:
+        # People already known from other shows are left untouched
+        db.execute(
+            sqlite_insert(models.Person).on_conflict_do_nothing(index_elements=["tmdb_id"]),
+            list(people.values()),
+        )
+        # The check above means the show has no cast rows yet
+        db.execute(insert(models.ShowCast), list(cast.values()))
+    db.commit()
+    if cast:
+        _cast_cached.add(show.tmdb_id)
 
-        # ShowCast entry (skip if already exists)
-        exists = db.execute(
-            select(models.ShowCast).where(
-                models.ShowCast.show_tmdb_id == show.tmdb_id,
-                models.ShowCast.person_tmdb_id == person_id,
-            )
-        ).scalar_one_or_none()
-        if not exists:
-            db.add(models.ShowCast(
-                show_tmdb_id=show.tmdb_id,
-                person_tmdb_id=person_id,
-                character=member.get("character", ""),
-                order=member.get("order", 999),
-            ))
 
-    db.commit()
+def _insert_person_credits(rows: list[dict], db: Session) -> None:
+    """Bulk-insert credit rows, skipping (person, show) pairs already stored.
+
+    person_credits has no unique key to conflict on, so the existing pairs for
+    every person in the batch are read in one query instead of probing per credit.
+    """
+    if not rows:
+        return
+    person_ids = {row["person_tmdb_id"] for row in rows}
+    existing = set(db.execute(
+        select(models.PersonCredit.person_tmdb_id, models.PersonCredit.show_tmdb_id)
+        .where(models.PersonCredit.person_tmdb_id.in_(person_ids))
+    ).tuples())
+    new_rows = [
+        row for row in rows
+        if (row["person_tmdb_id"], row["show_tmdb_id"]) not in existing
+    ]
+    if new_rows:
+        db.execute(insert(models.PersonCredit), new_rows)
 
 
 async def _ensure_person_credits_cached(person: models.Person, db: Session) -> None:
@@ -76,6 +152,7 @@ async def _ensure_person_credits_cached(person: models.Person, db: Session) -> N
         return
 
     data = await tmdb.get_person_credits(person.tmdb_id)
+    rows = []
     for credit in data.get("cast", []):
         show_tmdb_id = credit.get("id")
         media_type = credit.get("media_type", "tv")
@@ -86,23 +163,17 @@ async def _ensure_person_credits_cached(person: models.Person, db: Session) -> N
 
         first_air = credit.get("first_air_date") or credit.get("release_date") or None
 
-        exists = db.execute(
-            select(models.PersonCredit).where(
-                models.PersonCredit.person_tmdb_id == person.tmdb_id,
-                models.PersonCredit.show_tmdb_id == show_tmdb_id,
-            )
-        ).scalar_one_or_none()
-        if not exists:
-            db.add(models.PersonCredit(
-                person_tmdb_id=person.tmdb_id,
-                show_tmdb_id=show_tmdb_id,
-                title=title,
-                character=credit.get("character", ""),
-                type=media_type,
-                first_air_date=first_air,
-            ))
-
-    person.credits_cached_at = datetime.now(timezone.utc).isoformat()
+        rows.append({
+            "person_tmdb_id": person.tmdb_id,
+            "show_tmdb_id": show_tmdb_id,
+            "title": title,
+            "character": credit.get("character", ""),
+            "type": media_type,
+            "first_air_date": first_air,
+        })
+    _insert_person_credits(rows, db)
+
+    person.credits_cached_at = models._utcnow()
     try:
         details = await tmdb.get_person(person.tmdb_id)
         person.birthday = details.get("birthday")
@@ -112,6 +183,43 @@ async def _ensure_person_credits_cached(person: models.Person, db: Session) -> N
     db.commit()
 
 
+def _is_watched(show_tmdb_id):
+    """SQL condition: the show has a watched episode, or is a watched movie.
+
+    Correlated per row, so each probe is an index lookup and the cost follows
+    the rows being filtered rather than the size of the watch history.
+    """
+    return (
+        select(models.Episode.id).where(
+            models.Episode.watched == True,  # noqa: E712
+            models.Episode.tmdb_show_id == show_tmdb_id,
+        ).exists()
+        | select(models.Show.id).where(
+            models.Show.tmdb_id == show_tmdb_id,
+            models.Show.type == "movie",
+            models.Show.watched == True,  # noqa: E712
+        ).exists()
+    )
+
+
+def _seen_in_column(exclude_show_id: int | None = None):
+    """SQL expression for a person's watched-show count, to select alongside Person.
+
+    Denormalized per person and kept current by triggers (see migration 17).
+    With exclude_show_id, the current show is taken off the count when it's
+    watched and the person is credited in it.
+    """
+    count = func.coalesce(models.Person.seen_in_count, 0)
+    if exclude_show_id is None:
+        return count
+    show_watched = _is_watched(exclude_show_id)
+    credited = select(models.PersonCredit.id).where(
+        models.PersonCredit.show_tmdb_id == exclude_show_id,
+        models.PersonCredit.person_tmdb_id == models.Person.tmdb_id,
+    ).exists()
+    return count - case((and_(show_watched, credited), 1), else_=0)
+
+
 def _seen_in_counts(
     person_ids: list[int],
     db: Session,
@@ -124,30 +232,11 @@ def _seen_in_counts(
     """
     if not person_ids:
         return {}
-    # TV: shows with at least one watched episode
-    tv_watched = select(models.Episode.tmdb_show_id).distinct().where(
-        models.Episode.watched == True  # noqa: E712
-    )
-    # Movies: shows with type=movie and watched=True
-    movie_watched = select(models.Show.tmdb_id).where(
-        models.Show.type == "movie",
-        models.Show.watched == True,  # noqa: E712
-    )
-    watched_show_ids = union(tv_watched, movie_watched)
-    q = (
-        select(
-            models.PersonCredit.person_tmdb_id,
-            func.count(models.PersonCredit.show_tmdb_id.distinct()).label("cnt"),
-        )
-        .where(
-            models.PersonCredit.person_tmdb_id.in_(person_ids),
-            models.PersonCredit.show_tmdb_id.in_(watched_show_ids),
-        )
-    )
-    if exclude_show_id is not None:
-        q = q.where(models.PersonCredit.show_tmdb_id != exclude_show_id)
-    rows = db.execute(q.group_by(models.PersonCredit.person_tmdb_id)).all()
-    return {row.person_tmdb_id: row.cnt for row in rows}
+    counts = db.execute(
+        select(models.Person.tmdb_id, _seen_in_column(exclude_show_id))
+        .where(models.Person.tmdb_id.in_(person_ids))
+    ).all()
+    return {person_id: cnt for person_id, cnt in counts if cnt}
 
 
 async def _backfill_episode_credits(person_tmdb_id: int, show_tmdb_ids: list[int]) -> None:
@@ -177,6 +266,7 @@ async def _backfill_episode_credits(person_tmdb_id: int, show_tmdb_ids: list[int
                 return_exceptions=True,
             )
 
+            credit_rows = []
             for row, result in zip(watched_eps, results):
                 if isinstance(result, Exception):
                     continue
@@ -184,22 +274,16 @@ async def _backfill_episode_credits(person_tmdb_id: int, show_tmdb_ids: list[int
                 for member in all_members:
                     if member.get("id") != person_tmdb_id:
                         continue
-                    exists = db.execute(
-                        select(models.EpisodeCredit).where(
-                            models.EpisodeCredit.person_tmdb_id == person_tmdb_id,
-                            models.EpisodeCredit.show_tmdb_id == show_tmdb_id,
-                            models.EpisodeCredit.season_number == row.season_number,
-                            models.EpisodeCredit.episode_number == row.episode_number,
-                        )
-                    ).scalar_one_or_none()
-                    if not exists:
-                        db.add(models.EpisodeCredit(
-                            person_tmdb_id=person_tmdb_id,
-                            show_tmdb_id=show_tmdb_id,
-                            season_number=row.season_number,
-                            episode_number=row.episode_number,
-                            character=member.get("character", ""),
-                        ))
+                    credit_rows.append({
+                        "person_tmdb_id": person_tmdb_id,
+                        "show_tmdb_id": show_tmdb_id,
+                        "season_number": row.season_number,
+                        "episode_number": row.episode_number,
+                        "character": member.get("character", ""),
+                    })
+            if credit_rows:
+                # The unique key skips episodes already credited — no probe per row
+                db.execute(sqlite_insert(models.EpisodeCredit).on_conflict_do_nothing(), credit_rows)
             db.commit()
     finally:
         db.close()
@@ -208,6 +292,11 @@ async def _backfill_episode_credits(person_tmdb_id: int, show_tmdb_ids: list[int
 @router.get("/shows/{tmdb_show_id}/cast")
 async def get_show_cast(tmdb_show_id: int, db: Session = Depends(get_db)):
     """Get cast for a show, fetching from TMDB if not yet cached."""
+    cache_key = ("cast", tmdb_show_id)
+    cached = _cached_response(cache_key, _data_version(db))
+    if cached is not None:
+        return cached
+
     show = db.execute(
         select(models.Show).where(models.Show.tmdb_id == tmdb_show_id)
     ).scalar_one_or_none()
@@ -216,27 +305,31 @@ async def get_show_cast(tmdb_show_id: int, db: Session = Depends(get_db)):
 
     await _ensure_cast_cached(show, db)
 
-    rows = db.execute(
-        select(models.ShowCast, models.Person)
+    # SQLite assembles the JSON array itself: one TEXT value, no per-row dicts
+    cast = (
+        select(
+            models.ShowCast.person_tmdb_id,
+            models.Person.name,
+            models.Person.profile_path,
+            models.ShowCast.character,
+            models.ShowCast.order,
+            _seen_in_column(tmdb_show_id).label("seen_in_count"),
+        )
         .join(models.Person, models.Person.tmdb_id == models.ShowCast.person_tmdb_id)
         .where(models.ShowCast.show_tmdb_id == tmdb_show_id)
         .order_by(models.ShowCast.order)
-    ).all()
+        .subquery()
+    )
+    payload = db.execute(select(func.json_group_array(func.json_object(
+        "person_tmdb_id", cast.c.person_tmdb_id,
+        "name", cast.c.name,
+        "profile_path", cast.c.profile_path,
+        "character", cast.c.character,
+        "order", cast.c.order,
+        "seen_in_count", cast.c.seen_in_count,
+    )))).scalar_one()
 
-    person_ids = [sc.person_tmdb_id for sc, p in rows]
-    seen_in_map = _seen_in_counts(person_ids, db, exclude_show_id=tmdb_show_id)
-
-    return [
-        {
-            "person_tmdb_id": sc.person_tmdb_id,
-            "name": p.name,
-            "profile_path": p.profile_path,
-            "character": sc.character,
-            "order": sc.order,
-            "seen_in_count": seen_in_map.get(sc.person_tmdb_id, 0),
-        }
-        for sc, p in rows
-    ]
+    return _store_body(cache_key, db, payload.encode())
 
 
 @router.get("/people/{tmdb_person_id}/all-credits")
@@ -249,23 +342,27 @@ def get_all_credits(tmdb_person_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Person not found")
 
     rows = db.execute(
-        select(models.PersonCredit, models.Show.poster_path)
-        .outerjoin(models.Show, models.Show.tmdb_id == models.PersonCredit.show_tmdb_id)
+        select(
+            models.PersonCredit.show_tmdb_id,
+            models.PersonCredit.title,
+            models.PersonCredit.character,
+            models.PersonCredit.type,
+            models.PersonCredit.first_air_date,
+        )
         .where(models.PersonCredit.person_tmdb_id == tmdb_person_id)
         .order_by(models.PersonCredit.first_air_date.desc().nulls_last())
     ).all()
 
-    return [
-        {
-            "show_tmdb_id": pc.show_tmdb_id,
-            "title": pc.title,
-            "character": pc.character,
-            "type": pc.type,
-            "first_air_date": pc.first_air_date,
-            "poster_path": poster_path,
-        }
-        for pc, poster_path in rows
-    ]
+    # Posters for the tracked ones, in one IN() lookup
+    posters = dict(db.execute(
+        select(models.Show.tmdb_id, models.Show.poster_path)
+        .where(models.Show.tmdb_id.in_(list({r.show_tmdb_id for r in rows})))
+    ).all())
+
+    return _json(orjson.dumps([
+        {**row._asdict(), "poster_path": posters.get(row.show_tmdb_id)}
+        for row in rows
+    ]))
 
 
 @router.get("/people/{tmdb_person_id}/seen-in")
@@ -274,6 +371,11 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
     Core WHIST query: return all credits for a person that overlap with
     the user's watch history (shows that have at least one watched episode).
     """
+    cache_key = ("seen_in", tmdb_person_id)
+    cached = _cached_response(cache_key, _data_version(db))
+    if cached is not None:
+        return cached
+
     person = db.execute(
         select(models.Person).where(models.Person.tmdb_id == tmdb_person_id)
     ).scalar_one_or_none()
@@ -295,26 +397,31 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
         except Exception:
             pass
 
-    # Subquery: TV shows with at least one watched episode + watched movies
-    tv_watched = select(models.Episode.tmdb_show_id).distinct().where(
-        models.Episode.watched == True  # noqa: E712
-    )
-    movie_watched = select(models.Show.tmdb_id).where(
-        models.Show.type == "movie",
-        models.Show.watched == True,  # noqa: E712
-    )
-    watched_show_ids = union(tv_watched, movie_watched)
-
-    # Main query: person's credits ∩ watch history, joined to shows for poster + air date fallback
+    # Main query: person's credits ∩ watch history
     rows = db.execute(
-        select(models.PersonCredit, models.Show.poster_path, models.Show.first_air_date)
-        .outerjoin(models.Show, models.Show.tmdb_id == models.PersonCredit.show_tmdb_id)
+        select(
+            models.PersonCredit.show_tmdb_id,
+            models.PersonCredit.title,
+            models.PersonCredit.character,
+            models.PersonCredit.type,
+            models.PersonCredit.first_air_date,
+        )
         .where(
             models.PersonCredit.person_tmdb_id == tmdb_person_id,
-            models.PersonCredit.show_tmdb_id.in_(watched_show_ids),
+            _is_watched(models.PersonCredit.show_tmdb_id),
         )
         .order_by(models.PersonCredit.first_air_date.desc().nulls_last())
     ).all()
+    credited_ids = list({pc.show_tmdb_id for pc in rows})
+
+    # Tracked shows for poster + air date fallback, in one IN() lookup
+    shows = {
+        s.tmdb_id: s
+        for s in db.execute(
+            select(models.Show.tmdb_id, models.Show.poster_path, models.Show.first_air_date)
+            .where(models.Show.tmdb_id.in_(credited_ids))
+        )
+    }
 
     # Determine main cast vs guest: person in ShowCast = main cast
     main_show_ids = set(db.execute(
@@ -322,9 +429,41 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
         .where(models.ShowCast.person_tmdb_id == tmdb_person_id)
     ).scalars().all())
 
+    # First watched episode per guest TV show, for episode links — one query for all
+    guest_tv_ids = [
+        pc.show_tmdb_id for pc in rows
+        if pc.show_tmdb_id not in main_show_ids and pc.type != "movie"
+    ]
+    first_eps = {}
+    if guest_tv_ids:
+        for ep in db.execute(
+            select(
+                models.EpisodeCredit.show_tmdb_id,
+                models.EpisodeCredit.season_number,
+                models.EpisodeCredit.episode_number,
+            )
+            .join(models.Episode, and_(
+                models.Episode.tmdb_show_id == models.EpisodeCredit.show_tmdb_id,
+                models.Episode.season_number == models.EpisodeCredit.season_number,
+                models.Episode.episode_number == models.EpisodeCredit.episode_number,
+                models.Episode.watched == True,  # noqa: E712
+            ))
+            .where(
+                models.EpisodeCredit.person_tmdb_id == tmdb_person_id,
+                models.EpisodeCredit.show_tmdb_id.in_(guest_tv_ids),
+            )
+            .order_by(
+                models.EpisodeCredit.show_tmdb_id,
+                models.EpisodeCredit.season_number,
+                models.EpisodeCredit.episode_number,
+            )
+        ):
+            first_eps.setdefault(ep.show_tmdb_id, ep)
+
     main_cast, guest = [], []
-    for pc, poster_path, show_air_date in rows:
-        air_date = pc.first_air_date or show_air_date
+    for pc in rows:
+        show = shows.get(pc.show_tmdb_id)
+        air_date = pc.first_air_date or (show.first_air_date if show else None)
         entry = {
             "tmdb_id": pc.show_tmdb_id,
             "title": pc.title,
@@ -332,7 +471,7 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
             "type": pc.type,
             "first_air_date": air_date,
             "age_at_filming": _age_at(person.birthday, air_date),
-            "poster_path": poster_path,
+            "poster_path": show.poster_path if show else None,
         }
         if pc.show_tmdb_id in main_show_ids:
             main_cast.append(entry)
@@ -342,22 +481,7 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
             entry["episode_number"] = None
             guest.append(entry)
         else:
-            # Look up first watched episode for episode links
-            ep = db.execute(
-                select(models.EpisodeCredit)
-                .join(models.Episode, and_(
-                    models.Episode.tmdb_show_id == models.EpisodeCredit.show_tmdb_id,
-                    models.Episode.season_number == models.EpisodeCredit.season_number,
-                    models.Episode.episode_number == models.EpisodeCredit.episode_number,
-                    models.Episode.watched == True,  # noqa: E712
-                ))
-                .where(
-                    models.EpisodeCredit.person_tmdb_id == tmdb_person_id,
-                    models.EpisodeCredit.show_tmdb_id == pc.show_tmdb_id,
-                )
-                .order_by(models.EpisodeCredit.season_number, models.EpisodeCredit.episode_number)
-                .limit(1)
-            ).scalar_one_or_none()
+            ep = first_eps.get(pc.show_tmdb_id)
             entry["season_number"] = ep.season_number if ep else None
             entry["episode_number"] = ep.episode_number if ep else None
             guest.append(entry)
@@ -370,7 +494,7 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
     if missing_ep_data:
         background_tasks.add_task(_backfill_episode_credits, tmdb_person_id, missing_ep_data)
 
-    return {
+    return _store_response(cache_key, db, {
         "person": {
             "tmdb_id": person.tmdb_id,
             "name": person.name,
@@ -380,7 +504,7 @@ async def seen_in(tmdb_person_id: int, background_tasks: BackgroundTasks, db: Se
         },
         "main_cast": main_cast,
         "guest": guest,
-    }
+    })
 
 
 @router.get("/shows/{tmdb_show_id}/season/{season_number}/episode/{episode_number}/cast")
@@ -395,56 +519,72 @@ async def get_episode_cast(
     Persons are upserted and their credits pre-cached (parallel TMDB fetches)
     so badges are populated on first visit.
     """
-    show = db.execute(
-        select(models.Show).where(models.Show.tmdb_id == tmdb_show_id)
-    ).scalar_one_or_none()
+    cache_key = ("episode_cast", tmdb_show_id, season_number, episode_number)
+    cached = _cached_response(cache_key, _data_version(db))
+    if cached is not None:
+        return cached
+
+    # The show lookup and the TMDB fetch don't depend on each other — overlap them
+    def load_show() -> models.Show | None:
+        return db.execute(
+            select(models.Show).where(models.Show.tmdb_id == tmdb_show_id)
+        ).scalar_one_or_none()
+
+    show, data = await asyncio.gather(
+        asyncio.to_thread(load_show),
+        tmdb.get_episode_credits(tmdb_show_id, season_number, episode_number),
+        return_exceptions=True,
+    )
+    if isinstance(show, Exception):
+        raise show
     if not show:
         raise HTTPException(status_code=404, detail="Show not tracked")
-
-    try:
-        data = await tmdb.get_episode_credits(tmdb_show_id, season_number, episode_number)
-    except Exception:
+    if isinstance(data, Exception):
         raise HTTPException(status_code=502, detail="Failed to fetch episode credits from TMDB")
 
     cast = data.get("cast", [])
     guest_stars = data.get("guest_stars", [])
     all_members = cast + guest_stars
+    all_ids = [m.get("id") for m in all_members if m.get("id")]
 
-    # Upsert persons so they're available for person pages
-    for member in all_members:
-        person_id = member.get("id")
-        if not person_id:
-            continue
-        exists = db.execute(
-            select(models.Person).where(models.Person.tmdb_id == person_id)
-        ).scalar_one_or_none()
-        if not exists:
-            db.add(models.Person(
-                tmdb_id=person_id,
-                name=member.get("name", "Unknown"),
-                profile_path=member.get("profile_path"),
-            ))
-    db.commit()
+    # Blocking sqlite work runs in worker threads; the TMDB awaits stay on the loop
+    def upsert_people() -> list[int]:
+        # One IN() lookup for who's already stored, diffed in Python
+        cached_at = dict(db.execute(
+            select(models.Person.tmdb_id, models.Person.credits_cached_at)
+            .where(models.Person.tmdb_id.in_(all_ids))
+        ).all())
+        # Upsert persons so they're available for person pages
+        new_people = {}
+        for member in all_members:
+            person_id = member.get("id")
+            if person_id and person_id not in cached_at and person_id not in new_people:
+                new_people[person_id] = {
+                    "tmdb_id": person_id,
+                    "name": member.get("name", "Unknown"),
+                    "profile_path": member.get("profile_path"),
+                }
+        if new_people:
+            db.execute(
+                sqlite_insert(models.Person).on_conflict_do_nothing(index_elements=["tmdb_id"]),
+                list(new_people.values()),
+            )
+            db.commit()
+        return [pid for pid in dict.fromkeys(all_ids) if not cached_at.get(pid)]
 
     # Pre-cache credits for all persons whose credits aren't cached yet.
     # Fetch from TMDB in parallel, write to DB sequentially after.
-    persons_to_cache = []
-    for member in all_members:
-        person_id = member.get("id")
-        if not person_id:
-            continue
-        person = db.execute(
-            select(models.Person).where(models.Person.tmdb_id == person_id)
-        ).scalar_one_or_none()
-        if person and not person.credits_cached_at:
-            persons_to_cache.append(person)
+    ids_to_cache = await asyncio.to_thread(upsert_people)
+    credit_results = await asyncio.gather(
+        *[tmdb.get_person_credits(pid) for pid in ids_to_cache],
+        return_exceptions=True,
+    )
 
-    if persons_to_cache:
-        credit_results = await asyncio.gather(
-            *[tmdb.get_person_credits(p.tmdb_id) for p in persons_to_cache],
-            return_exceptions=True,
-        )
-        for person, result in zip(persons_to_cache, credit_results):
+    def store_credits() -> dict[int, int]:
+        # Every fetched filmography flattened into one batch: two statements
+        # (existing-pair lookup + executemany insert) however many people
+        cached_ids, rows = [], []
+        for person_id, result in zip(ids_to_cache, credit_results):
             if isinstance(result, Exception):
                 continue
             for credit in result.get("cast", []):
@@ -453,49 +593,42 @@ async def get_episode_cast(
                 if not show_id or media_type not in ("tv", "movie"):
                     continue
                 title = credit.get("name") or credit.get("title") or "Unknown"
-                already = db.execute(
-                    select(models.PersonCredit).where(
-                        models.PersonCredit.person_tmdb_id == person.tmdb_id,
-                        models.PersonCredit.show_tmdb_id == show_id,
-                    )
-                ).scalar_one_or_none()
-                if not already:
-                    db.add(models.PersonCredit(
-                        person_tmdb_id=person.tmdb_id,
-                        show_tmdb_id=show_id,
-                        title=title,
-                        character=credit.get("character", ""),
-                        type=media_type,
-                    ))
-            person.credits_cached_at = datetime.now(timezone.utc).isoformat()
+                rows.append({
+                    "person_tmdb_id": person_id,
+                    "show_tmdb_id": show_id,
+                    "title": title,
+                    "character": credit.get("character", ""),
+                    "type": media_type,
+                })
+            cached_ids.append(person_id)
+        _insert_person_credits(rows, db)
+        if cached_ids:
+            db.execute(
+                update(models.Person)
+                .where(models.Person.tmdb_id.in_(cached_ids))
+                .values(credits_cached_at=models._utcnow())
+            )
+
+        # Populate EpisodeCredit rows for all cast members (main cast + guest stars);
+        # the unique key on (person, show, season, episode) skips ones already stored
+        episode_rows = [
+            {
+                "person_tmdb_id": m["id"],
+                "show_tmdb_id": tmdb_show_id,
+                "season_number": season_number,
+                "episode_number": episode_number,
+                "character": m.get("character", ""),
+            }
+            for m in all_members if m.get("id")
+        ]
+        if episode_rows:
+            db.execute(sqlite_insert(models.EpisodeCredit).on_conflict_do_nothing(), episode_rows)
         db.commit()
 
-    # Populate EpisodeCredit rows for all cast members (main cast + guest stars)
-    for member in all_members:
-        person_id = member.get("id")
-        if not person_id:
-            continue
-        exists = db.execute(
-            select(models.EpisodeCredit).where(
-                models.EpisodeCredit.person_tmdb_id == person_id,
-                models.EpisodeCredit.show_tmdb_id == tmdb_show_id,
-                models.EpisodeCredit.season_number == season_number,
-                models.EpisodeCredit.episode_number == episode_number,
-            )
-        ).scalar_one_or_none()
-        if not exists:
-            db.add(models.EpisodeCredit(
-                person_tmdb_id=person_id,
-                show_tmdb_id=tmdb_show_id,
-                season_number=season_number,
-                episode_number=episode_number,
-                character=member.get("character", ""),
-            ))
-    db.commit()
+        # Seen-in counts, excluding the current show so "1 = only this show" → hidden
+        return _seen_in_counts(all_ids, db, exclude_show_id=tmdb_show_id)
 
-    # Seen-in counts, excluding the current show so "1 = only this show" → hidden
-    all_ids = [m.get("id") for m in all_members if m.get("id")]
-    seen_in_map = _seen_in_counts(all_ids, db, exclude_show_id=tmdb_show_id)
+    seen_in_map = await asyncio.to_thread(store_credits)
 
     def fmt(m):
         return {
@@ -507,7 +640,7 @@ async def get_episode_cast(
             "seen_in_count": seen_in_map.get(m.get("id"), 0),
         }
 
-    return {
+    return _store_response(cache_key, db, {
         "cast": sorted([fmt(m) for m in cast if m.get("id")], key=lambda x: x["order"]),
         "guest_stars": sorted([fmt(m) for m in guest_stars if m.get("id")], key=lambda x: x["order"]),
-    }
+    })
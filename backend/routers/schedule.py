@@ -1,16 +1,76 @@
+import asyncio
+import time
 from datetime import date, timedelta
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select, update
+from fastapi import APIRouter, Depends, Response
+import orjson
+from sqlalchemy import Row, and_, bindparam, func, or_, select, text, update
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
 from backend import models, tmdb
+from backend.routers.episodes import progress_for_shows
 
 router = APIRouter(prefix="/schedule", tags=["schedule"])
 
+# Hot per-request statements, built once at import so handlers only bind parameters
+_TV_BY_STATUS = select(models.Show).where(
+    models.Show.user_status == bindparam("status"),
+    models.Show.type == "tv",
+)
+
+# Shows on today's schedule, filtered in SQL: airing and watching shows minus
+# those idle 3+ months (not abandoned yet, but off the schedule) and weekly-pace
+# shows watched within the last 7 days. Only the columns the cards read.
+_last_watched = and_(
+    models.Show.last_watched_at.isnot(None),
+    models.Show.last_watched_at != "",
+)
+_SCHEDULED_SHOWS = (
+    select(
+        models.Show.tmdb_id,
+        models.Show.title,
+        models.Show.poster_path,
+        models.Show.user_status,
+        models.Show.watch_pace,
+    )
+    .where(
+        models.Show.user_status.in_(("airing", "watching")),
+        ~and_(_last_watched, models.Show.last_watched_at < bindparam("cutoff_3mo")),
+        ~and_(
+            models.Show.user_status == "watching",
+            func.coalesce(models.Show.watch_pace, "binge") == "weekly",
+            _last_watched,
+            models.Show.last_watched_at >= bindparam("cutoff_weekly"),
+        ),
+    )
+    .order_by(models.Show.last_watched_at.desc().nulls_last())
+)
+
+_DAY_CACHE: dict = {"day": None, "dates": None}
+
+# Last /today response, reused while the day and schedule_version (bumped by
+# triggers on any schedule-relevant write, see migration 20) are unchanged.
+# The TTL bounds how long TMDB-driven status changes can go unchecked.
+_SCHEDULE_VERSION = text("SELECT seq FROM schedule_version")
+_RESPONSE_TTL = 60  # seconds
+_response_cache: dict = {"key": None, "expires": 0.0, "body": None}
+
 
-def _ep_card(show: models.Show, ep: models.Episode, available_count: int, suggested_count: int) -> dict:
+def _schedule_dates() -> dict[str, str]:
+    """Today and the schedule's cutoff dates as ISO strings, computed once per day."""
+    d = date.today()
+    if _DAY_CACHE["day"] != d:
+        _DAY_CACHE.update(day=d, dates={
+            "today":         d.isoformat(),
+            "cutoff_weekly": (d - timedelta(days=7)).isoformat(),
+            "cutoff_3mo":    (d - timedelta(days=90)).isoformat(),
+            "cutoff_6mo":    (d - timedelta(days=180)).isoformat(),
+        })
+    return _DAY_CACHE["dates"]
+
+
+def _ep_card(show: Row, ep: Row, available_count: int, suggested_count: int) -> dict:
     return {
         "show": {
             "tmdb_id": show.tmdb_id,
@@ -30,15 +90,21 @@ def _ep_card(show: models.Show, ep: models.Episode, available_count: int, sugges
     }
 
 
-def _active_season_floor(db: Session, tmdb_show_id: int) -> int | None:
-    """Return the highest season the user has started (≥1 watched ep), or None."""
-    return db.execute(
-        select(func.max(models.Episode.season_number))
-        .where(
-            models.Episode.tmdb_show_id == tmdb_show_id,
-            models.Episode.watched == True,  # noqa: E712
+def _active_season_floors(tmdb_ids: list[int]):
+    """Subquery of (tmdb_show_id, floor): the highest season with a watched episode.
+
+    Read from the trigger-maintained shows.active_season, so no pass over
+    episodes; shows with nothing watched have a NULL floor and fall back to
+    season 1.
+    """
+    return (
+        select(
+            models.Show.tmdb_id.label("tmdb_show_id"),
+            models.Show.active_season.label("floor"),
         )
-    ).scalar_one_or_none()
+        .where(models.Show.tmdb_id.in_(tmdb_ids))
+        .subquery()
+    )
 
 
 @router.get("/today")
@@ -51,58 +117,113 @@ async def get_schedule_today(db: Session = Depends(get_db)):
     Episodes are surfaced from the active season onward (highest season with a watched
     episode), so old unstarted seasons are skipped automatically.
     """
-    tod           = date.today().isoformat()
-    cutoff_weekly = (date.today() - timedelta(days=7)).isoformat()
-    cutoff_3mo    = (date.today() - timedelta(days=90)).isoformat()
-    cutoff_6mo    = (date.today() - timedelta(days=180)).isoformat()
-
-    # Auto-abandon watching shows idle for 6+ months
-    db.execute(
-        update(models.Show)
-        .where(
-            models.Show.user_status == "watching",
-            models.Show.last_watched_at.isnot(None),
-            func.substr(models.Show.last_watched_at, 1, 10) < cutoff_6mo,
+    dates = _schedule_dates()
+    tod = dates["today"]
+    # ISO-8601 timestamps sort chronologically, so they compare directly against
+    # these date cutoffs — no substr()/slicing, which would defeat indexes.
+    seq = await asyncio.to_thread(lambda: db.execute(_SCHEDULE_VERSION).scalar())
+    if _response_cache["key"] == (tod, seq) and _response_cache["expires"] > time.monotonic():
+        return Response(_response_cache["body"], media_type="application/json")
+
+    # Episode filters shared by the checks below
+    not_dismissed = models.Episode.dismissed == False  # noqa: E712
+    aired = [
+        models.Episode.air_date.isnot(None),
+        models.Episode.air_date <= tod,
+    ]
+
+    # Blocking sqlite work runs in worker threads; the TMDB awaits stay on the loop
+    def load_hiatus() -> list[models.Show]:
+        # Auto-abandon watching shows idle for 6+ months
+        db.execute(
+            update(models.Show)
+            .where(
+                models.Show.user_status == "watching",
+                models.Show.last_watched_at.isnot(None),
+                models.Show.last_watched_at < dates["cutoff_6mo"],
+            )
+            .values(user_status="abandoned")
+        )
+        db.commit()
+        return db.execute(_TV_BY_STATUS, {"status": "hiatus"}).scalars().all()
+
+    def load_airing() -> tuple[list[models.Show], set[int]]:
+        db.commit()  # hiatus shows that came back
+        airing_tv = db.execute(_TV_BY_STATUS, {"status": "airing"}).scalars().all()
+        # Shows with something left to watch from their active season onward, in one
+        # query; EXISTS stops at the first such episode rather than visiting them all
+        behind = set(db.execute(
+            select(models.Show.tmdb_id).where(
+                models.Show.tmdb_id.in_([s.tmdb_id for s in airing_tv]),
+                select(models.Episode.id).where(
+                    models.Episode.tmdb_show_id == models.Show.tmdb_id,
+                    models.Episode.season_number >= func.coalesce(models.Show.active_season, 1),
+                    models.Episode.watched == False,  # noqa: E712
+                    not_dismissed,
+                    *aired,
+                ).exists(),
+            )
+        ).scalars()) if airing_tv else set()
+        return airing_tv, behind
+
+    def build() -> bytes:
+        db.commit()  # auto-hiatus changes
+        # Cache key: the version after this request's own writes (auto-abandon,
+        # hiatus), read before the data it covers. A write landing mid-build then
+        # leaves the key behind the body, never a stale body under a newer key.
+        seq = db.execute(_SCHEDULE_VERSION).scalar()
+        scheduled = db.execute(_SCHEDULED_SHOWS, {
+            "cutoff_3mo": dates["cutoff_3mo"],
+            "cutoff_weekly": dates["cutoff_weekly"],
+        }).all()
+        airing_shows = [s for s in scheduled if s.user_status == "airing"]
+        watching_shows = [s for s in scheduled if s.user_status == "watching"]
+
+        # Progress from the active season onward for every scheduled show in one
+        # query; only airing shows are limited to episodes that have aired
+        airing_ids = [s.tmdb_id for s in airing_shows]
+        scheduled_ids = airing_ids + [s.tmdb_id for s in watching_shows]
+        progress_by_show = progress_for_shows(
+            scheduled_ids, db,
+            not_dismissed,
+            or_(models.Episode.tmdb_show_id.not_in(airing_ids), and_(*aired)),
+            floors=_active_season_floors(scheduled_ids),
         )
-        .values(user_status="abandoned")
-    )
-    db.commit()
 
-    # Auto-return hiatus shows when TMDB has a next episode announced
-    hiatus_shows = db.execute(
-        select(models.Show).where(
-            models.Show.user_status == "hiatus",
-            models.Show.type == "tv",
+        items = []
+
+        # --- Airing shows: include if any unwatched aired episode exists at or after active season ---
+        for show in airing_shows:
+            progress = progress_by_show.get(show.tmdb_id)
+            if progress and progress["next_unwatched"]:
+                available_count = progress["total"] - progress["watched"]
+                items.append(_ep_card(show, progress["next_unwatched"], available_count, 0))
+
+        # --- Watching shows: filtered by pace setting, from active season onward ---
+        for show in watching_shows:
+            progress = progress_by_show.get(show.tmdb_id)
+            if progress and progress["next_unwatched"]:
+                suggested = 2 if (show.watch_pace or "binge") == "fast" else 0
+                items.append(_ep_card(show, progress["next_unwatched"], 0, suggested))
+
+        body = orjson.dumps({"items": items})
+        _response_cache.update(
+            key=(tod, seq),
+            expires=time.monotonic() + _RESPONSE_TTL,
+            body=body,
         )
-    ).scalars().all()
-    for show in hiatus_shows:
+        return body
+
+    # Auto-return hiatus shows when TMDB has a next episode announced
+    for show in await asyncio.to_thread(load_hiatus):
         tmdb_data = await tmdb.get_show(show.tmdb_id)
         if tmdb_data.get("next_episode_to_air"):
             show.user_status = "airing"
-    if hiatus_shows:
-        db.commit()
 
     # Auto-hiatus: for all airing TV shows, if caught up and TMDB has no next episode
-    for show in db.execute(
-        select(models.Show).where(
-            models.Show.user_status == "airing",
-            models.Show.type == "tv",
-        )
-    ).scalars().all():
-        floor = _active_season_floor(db, show.tmdb_id) or 1
-        caught_up = not db.execute(
-            select(models.Episode)
-            .where(
-                models.Episode.tmdb_show_id == show.tmdb_id,
-                models.Episode.season_number >= floor,
-                models.Episode.watched == False,  # noqa: E712
-                models.Episode.dismissed == False,  # noqa: E712
-                models.Episode.air_date.isnot(None),
-                models.Episode.air_date <= tod,
-            )
-            .limit(1)
-        ).scalar_one_or_none()
-        if not caught_up:
+    airing_tv, behind = await asyncio.to_thread(load_airing)
+    for show in airing_tv:
+        if show.tmdb_id in behind:
             continue
         tmdb_data = await tmdb.get_show(show.tmdb_id)
         tmdb_status = tmdb_data.get("status", "")
@@ -110,91 +231,6 @@ async def get_schedule_today(db: Session = Depends(get_db)):
             show.user_status = "finished"
         elif tmdb_status == "Returning Series" and not tmdb_data.get("next_episode_to_air"):
             show.user_status = "hiatus"
-    db.commit()
-
-    airing_shows = db.execute(
-        select(models.Show)
-        .where(models.Show.user_status == "airing")
-        .order_by(models.Show.last_watched_at.desc().nulls_last())
-    ).scalars().all()
-
-    watching_shows = db.execute(
-        select(models.Show)
-        .where(models.Show.user_status == "watching")
-        .order_by(models.Show.last_watched_at.desc().nulls_last())
-    ).scalars().all()
-
-    items = []
-
-    # --- Airing shows: include if any unwatched aired episode exists at or after active season ---
-    for show in airing_shows:
-        # Skip shows idle for 3+ months
-        if show.last_watched_at and show.last_watched_at[:10] < cutoff_3mo:
-            continue
-
-        floor = _active_season_floor(db, show.tmdb_id) or 1
-
-        available_count = db.execute(
-            select(func.count()).select_from(models.Episode)
-            .where(
-                models.Episode.tmdb_show_id == show.tmdb_id,
-                models.Episode.season_number >= floor,
-                models.Episode.watched == False,  # noqa: E712
-                models.Episode.dismissed == False,  # noqa: E712
-                models.Episode.air_date.isnot(None),
-                models.Episode.air_date <= tod,
-            )
-        ).scalar() or 0
-
-        if available_count == 0:
-            continue
-
-        next_ep = db.execute(
-            select(models.Episode)
-            .where(
-                models.Episode.tmdb_show_id == show.tmdb_id,
-                models.Episode.season_number >= floor,
-                models.Episode.watched == False,  # noqa: E712
-                models.Episode.dismissed == False,  # noqa: E712
-                models.Episode.air_date.isnot(None),
-                models.Episode.air_date <= tod,
-            )
-            .order_by(models.Episode.season_number, models.Episode.episode_number)
-            .limit(1)
-        ).scalar_one_or_none()
-
-        if next_ep:
-            items.append(_ep_card(show, next_ep, available_count, 0))
-
-    # --- Watching shows: filtered by pace setting, from active season onward ---
-    for show in watching_shows:
-        pace = show.watch_pace or "binge"
-        lwa  = show.last_watched_at
-
-        # Skip shows idle for 3+ months (not abandoned yet, but off the schedule)
-        if lwa and lwa[:10] < cutoff_3mo:
-            continue
-
-        # Weekly pace: skip if watched within the last 7 days
-        if pace == "weekly" and lwa and lwa >= cutoff_weekly:
-            continue
-
-        floor = _active_season_floor(db, show.tmdb_id) or 1
-
-        next_ep = db.execute(
-            select(models.Episode)
-            .where(
-                models.Episode.tmdb_show_id == show.tmdb_id,
-                models.Episode.season_number >= floor,
-                models.Episode.watched == False,  # noqa: E712
-                models.Episode.dismissed == False,  # noqa: E712
-            )
-            .order_by(models.Episode.season_number, models.Episode.episode_number)
-            .limit(1)
-        ).scalar_one_or_none()
-
-        if next_ep:
-            suggested = 2 if pace == "fast" else 0
-            items.append(_ep_card(show, next_ep, 0, suggested))
 
-    return {"items": items}
+    body = await asyncio.to_thread(build)
+    return Response(body, media_type="application/json")
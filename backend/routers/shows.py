@@ -1,11 +1,17 @@
+import asyncio
+import base64
+import re
 from datetime import datetime, timezone
+from functools import lru_cache
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+import orjson
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, case
+from sqlalchemy import select, func, case, and_, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from backend.database import get_db
+from backend.database import SessionLocal, get_db
 from backend import models
 from backend import tmdb
 
@@ -21,15 +27,18 @@ class WikiRequest(BaseModel):
     season_url_template: str | None = None
 
 
+_BRAND_SPELLED = {
+    "Paramount+": "Paramount Plus",
+    "Disney+":    "Disney Plus",
+    "Apple TV+":  "Apple TV Plus",
+}
+_BRAND_RE = re.compile("|".join(re.escape(brand) for brand in _BRAND_SPELLED))
+
+
+@lru_cache(maxsize=256)
 def _norm_name(name: str) -> str:
     """Normalize brand symbols so 'Paramount+' and 'Paramount Plus' compare equal."""
-    return (
-        name.replace("Paramount+", "Paramount Plus")
-            .replace("Disney+", "Disney Plus")
-            .replace("Apple TV+", "Apple TV Plus")
-            .strip()
-            .lower()
-    )
+    return _BRAND_RE.sub(lambda m: _BRAND_SPELLED[m.group(0)], name).strip().lower()
 
 
 _BRAND_DISPLAY = {
@@ -42,16 +51,6 @@ _BRAND_DISPLAY = {
 }
 
 
-def _lcp_words(word_lists: list[list[str]]) -> list[str]:
-    """Longest common word-prefix across all lists."""
-    prefix = list(word_lists[0])
-    for wl in word_lists[1:]:
-        prefix = [a for a, b in zip(prefix, wl) if a == b]
-        if not prefix:
-            break
-    return prefix
-
-
 def _dedup_providers(providers: list) -> list:
     """Keep one provider per brand.
 
@@ -60,22 +59,28 @@ def _dedup_providers(providers: list) -> list:
     and the display name is replaced with the longest common word-prefix of the
     group (e.g. all Paramount+ variants → 'Paramount+').
     """
-    from collections import defaultdict
-    groups: dict[str, list] = defaultdict(list)
+    # One pass: each name is normalized and split once, and every group keeps
+    # its running best entry and running word-prefix instead of re-deriving them
+    groups: dict[str, list] = {}   # key -> [best, best_sort_key, prefix]
     for p in providers:
-        words = _norm_name(p["provider_name"]).split()
+        norm = _norm_name(p["provider_name"])
+        words = norm.split()
         key = words[0] if words else "__empty__"
-        groups[key].append(p)
-
-    result = []
-    for members in groups.values():
-        word_lists = [_norm_name(p["provider_name"]).split() for p in members]
-
+        rank = (len(norm), p["provider_id"])
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [p, rank, words]
+            continue
         # Shortest-name entry → cleanest logo (fewest add-on words)
-        best = min(members, key=lambda p: (len(_norm_name(p["provider_name"])), p["provider_id"]))
+        if rank < group[1]:
+            group[0], group[1] = p, rank
+        if group[2]:
+            group[2] = [a for a, b in zip(group[2], words) if a == b]
 
+    result = []
+    for best, _, prefix in groups.values():
         # Override display name with LCP, mapped to known brand names
-        lcp_str = " ".join(_lcp_words(word_lists))
+        lcp_str = " ".join(prefix)
         display = _BRAND_DISPLAY.get(lcp_str, lcp_str.title())
         result.append({**best, "provider_name": display})
 
@@ -140,12 +145,53 @@ async def search_shows(body: ShowSearchRequest):
     ]
 
 
+def _details_json(details: dict) -> str:
+    """The TMDB show payload as stored on the row, minus the appended credits/providers."""
+    return orjson.dumps({
+        k: v for k, v in details.items() if k not in ("credits", "watch/providers")
+    }).decode()
+
+
+def _store_tmdb_details(tmdb_id: int, details: dict, db: Session) -> None:
+    """Save a TMDB show payload onto its tracked row for the detail page."""
+    db.execute(
+        update(models.Show)
+        .where(models.Show.tmdb_id == tmdb_id)
+        .values(tmdb_json=_details_json(details), tmdb_synced_at=models._utcnow())
+    )
+    db.commit()
+
+
+async def _refresh_tmdb_details(tmdb_id: int) -> None:
+    """Background task: re-fetch a tracked show's stale TMDB payload."""
+    try:
+        details = await tmdb.get_show(tmdb_id, force=True)
+    except Exception:
+        return  # keep serving the stored copy
+    db = SessionLocal()
+    try:
+        _store_tmdb_details(tmdb_id, details, db)
+    finally:
+        db.close()
+
+
 @router.get("/{tmdb_id}/detail")
-async def get_show_detail(tmdb_id: int, db: Session = Depends(get_db)):
+async def get_show_detail(
+    tmdb_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     """
     Combined show detail: TMDB metadata + local tracking state.
     Works for both tracked and untracked shows.
+
+    Tracked shows are served from the stored TMDB payload (stale-while-revalidate);
+    untracked ones, or tracked ones never synced, go to TMDB.
     """
+    return await _show_detail(tmdb_id, background_tasks, db)
+
+
+async def _show_detail(tmdb_id: int, background_tasks: BackgroundTasks, db: Session) -> dict:
     show = db.execute(
         select(models.Show).where(models.Show.tmdb_id == tmdb_id)
     ).scalar_one_or_none()
@@ -155,10 +201,21 @@ async def get_show_detail(tmdb_id: int, db: Session = Depends(get_db)):
         .order_by(models.ShowWiki.id)
     ).scalars().all()
 
-    try:
-        details = await tmdb.get_show(tmdb_id)
-    except Exception:
-        raise HTTPException(status_code=502, detail="Failed to fetch show details from TMDB")
+    if show and show.tmdb_json:
+        details = orjson.loads(show.tmdb_json)
+        # A payload without a sync time is treated as stale
+        stale = show.tmdb_synced_at is None or (
+            datetime.now(timezone.utc) - datetime.fromisoformat(show.tmdb_synced_at)
+        ).total_seconds() >= tmdb.show_ttl(details)
+        if stale:
+            background_tasks.add_task(_refresh_tmdb_details, tmdb_id)
+    else:
+        try:
+            details = await tmdb.get_show(tmdb_id)
+        except Exception:
+            raise HTTPException(status_code=502, detail="Failed to fetch show details from TMDB")
+        if show:
+            _store_tmdb_details(tmdb_id, details, db)
 
     return {
         "tmdb_id": tmdb_id,
@@ -192,24 +249,58 @@ async def get_show_detail(tmdb_id: int, db: Session = Depends(get_db)):
 @router.get("/{tmdb_id}/watch-providers")
 async def get_show_watch_providers(tmdb_id: int):
     """Streaming and rental providers for a show (US region, from TMDB)."""
-    try:
+    return await _watch_providers(tmdb_id)
+
+
+# Deduplicated provider lists per show; TMDB refreshes provider data at most daily
+_PROVIDERS_TTL = 6 * 3600
+
+
+async def _watch_providers(tmdb_id: int) -> dict:
+    async def fetch() -> dict:
         data = await tmdb.get_watch_providers(tmdb_id)
-    except Exception:
-        raise HTTPException(status_code=502, detail="Failed to fetch watch providers from TMDB")
+        us = data.get("results", {}).get("US", {})
 
-    us = data.get("results", {}).get("US", {})
+        def fmt(p):
+            return {
+                "provider_id":   p["provider_id"],
+                "provider_name": p["provider_name"],
+                "logo_path":     p.get("logo_path"),
+            }
 
-    def fmt(p):
         return {
-            "provider_id":   p["provider_id"],
-            "provider_name": p["provider_name"],
-            "logo_path":     p.get("logo_path"),
+            "streaming": _dedup_providers([fmt(p) for p in us.get("flatrate", [])]),
+            "rent":      _dedup_providers([fmt(p) for p in us.get("rent", [])]),
         }
 
-    return {
-        "streaming": _dedup_providers([fmt(p) for p in us.get("flatrate", [])]),
-        "rent":      _dedup_providers([fmt(p) for p in us.get("rent", [])]),
-    }
+    # Cached after processing, so a hit skips both the TMDB lookup and the dedup
+    try:
+        return await tmdb.memoized(f"watch-providers-{tmdb_id}", fetch, _PROVIDERS_TTL)
+    except Exception:
+        raise HTTPException(status_code=502, detail="Failed to fetch watch providers from TMDB")
+
+
+@router.get("/{tmdb_id}/full")
+async def get_show_full(
+    tmdb_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Detail and watch providers in one response, with the TMDB fetches run concurrently.
+
+    A part whose TMDB fetch fails comes back as null rather than failing the
+    whole response.
+    """
+    parts = await asyncio.gather(
+        _show_detail(tmdb_id, background_tasks, db),
+        _watch_providers(tmdb_id),
+        return_exceptions=True,
+    )
+    for part in parts:
+        if isinstance(part, Exception) and not isinstance(part, HTTPException):
+            raise part
+    detail, providers = (None if isinstance(part, HTTPException) else part for part in parts)
+    return {"detail": detail, "watch_providers": providers}
 
 
 @router.post("/add", response_model=ShowResponse)
@@ -235,18 +326,30 @@ async def add_show(body: ShowAddRequest, db: Session = Depends(get_db)):
     except Exception:
         raise HTTPException(status_code=502, detail="Failed to fetch show details from TMDB")
 
-    show = models.Show(
-        tmdb_id=body.tmdb_id,
-        title=details.get("name", "Unknown"),
-        poster_path=details.get("poster_path"),
-        user_status=body.user_status,
-        type=body.type,
-        added_at=datetime.now(timezone.utc).isoformat(),
-        first_air_date=details.get("first_air_date"),
-    )
-    db.add(show)
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING: the new row comes back in the
+    # same round trip, and a concurrent add of the same show can't raise
+    show = db.scalars(
+        sqlite_insert(models.Show)
+        .values(
+            tmdb_id=body.tmdb_id,
+            title=details.get("name", "Unknown"),
+            poster_path=details.get("poster_path"),
+            user_status=body.user_status,
+            type=body.type,
+            added_at=models._utcnow(),
+            first_air_date=details.get("first_air_date"),
+            tmdb_json=_details_json(details),
+            tmdb_synced_at=models._utcnow(),
+        )
+        .on_conflict_do_nothing(index_elements=["tmdb_id"])
+        .returning(models.Show)
+    ).one_or_none()
     db.commit()
-    db.refresh(show)
+    if show is None:
+        # Lost the race to another add: return the row it inserted
+        show = db.execute(
+            select(models.Show).where(models.Show.tmdb_id == body.tmdb_id)
+        ).scalar_one()
     return show
 
 
@@ -327,24 +430,98 @@ def delete_show_wiki(tmdb_id: int, wiki_id: int, db: Session = Depends(get_db)):
     return {"deleted": wiki_id}
 
 
-@router.get("", response_model=list[ShowResponse])
-def list_shows(db: Session = Depends(get_db)):
-    """List all tracked shows with episode progress, ordered by most recently watched first."""
+def _encode_cursor(last_watched_at: str | None, show_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([last_watched_at, show_id])).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[str | None, int]:
+    try:
+        last_watched_at, show_id = orjson.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    if not isinstance(show_id, int) or not isinstance(last_watched_at, (str, type(None))):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    return last_watched_at, show_id
+
+
+@router.get("")
+def list_shows(
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """List all tracked shows with episode progress, ordered by most recently watched first.
+
+    Shaped as ShowResponse, but built from plain rows and serialized with orjson
+    rather than validated per row through from_attributes.
+
+    Without `limit` the whole library comes back as a list. With it, the
+    response is {"items": [...], "next_cursor": str | None}; pass next_cursor
+    back as `cursor` for the following page. Pages are keyed on
+    (last_watched_at, id), so a page costs the same however deep it is.
+    """
+    Show = models.Show
+    order = (Show.last_watched_at.desc().nulls_last(), Show.id)
+    page = select(Show).where(Show.type == "tv")
+    if cursor is not None:
+        last_watched_at, show_id = _decode_cursor(cursor)
+        # Shows sorting after the cursor; never-watched shows come last
+        if last_watched_at is None:
+            page = page.where(Show.last_watched_at.is_(None), Show.id > show_id)
+        else:
+            page = page.where(or_(
+                Show.last_watched_at < last_watched_at,
+                and_(Show.last_watched_at == last_watched_at, Show.id > show_id),
+                Show.last_watched_at.is_(None),
+            ))
+    if limit is not None:
+        # One extra row tells whether another page follows
+        page = page.order_by(*order).limit(limit + 1)
+    page = page.subquery()
+
     rows = db.execute(
         select(
-            models.Show,
+            page.c.id,
+            page.c.tmdb_id,
+            page.c.title,
+            page.c.poster_path,
+            page.c.user_status,
+            page.c.type,
+            page.c.added_at,
+            page.c.last_watched_at,
             func.count(models.Episode.id).label("total_count"),
             func.sum(case((models.Episode.watched == True, 1), else_=0)).label("watched_count"),
+            page.c.first_air_date,
         )
-        .where(models.Show.type == "tv")
-        .outerjoin(models.Episode, models.Episode.tmdb_show_id == models.Show.tmdb_id)
-        .group_by(models.Show.id)
-        .order_by(models.Show.last_watched_at.desc().nulls_last())
+        .outerjoin(models.Episode, models.Episode.tmdb_show_id == page.c.tmdb_id)
+        .group_by(page.c.id)
+        .order_by(page.c.last_watched_at.desc().nulls_last(), page.c.id)
     ).all()
 
-    result = []
-    for show, total, watched in rows:
-        show.total_count = total or 0
-        show.watched_count = watched or 0
-        result.append(show)
-    return result
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].last_watched_at, rows[-1].id)
+
+    items = [
+        {
+            "id": r.id,
+            "tmdb_id": r.tmdb_id,
+            "title": r.title,
+            "poster_path": r.poster_path,
+            "user_status": r.user_status,
+            "type": r.type,
+            "added_at": r.added_at,
+            "last_watched_at": r.last_watched_at,
+            "watched_count": r.watched_count or 0,
+            "total_count": r.total_count or 0,
+            "first_air_date": r.first_air_date,
+        }
+        for r in rows
+    ]
+    if limit is None:
+        return Response(orjson.dumps(items), media_type="application/json")
+    return Response(
+        orjson.dumps({"items": items, "next_cursor": next_cursor}),
+        media_type="application/json",
+    )
@@ -1,120 +1,299 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable
+
 import httpx
+import orjson
 
 from backend.config import settings
 
 TMDB_BASE = "https://api.themoviedb.org/3"
 
+# One shared client: HTTP/2 multiplexes concurrent requests over a kept-alive
+# connection instead of paying a TLS handshake per burst. The API key rides on
+# the client, merged into every request's query string.
 _client = httpx.AsyncClient(
     base_url=TMDB_BASE,
-    timeout=10.0,
+    params={"api_key": settings.tmdb_api_key},
+    timeout=httpx.Timeout(10.0, connect=3.0),
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=32, keepalive_expiry=60),
 )
 
+# Cap on in-flight TMDB requests, so wide fan-outs (e.g. pre-caching credits
+# for every guest star) queue up instead of tripping TMDB's rate limit.
+_MAX_CONCURRENT = 8
+_sem = asyncio.Semaphore(_MAX_CONCURRENT)
+
+# On-disk response cache TTLs (seconds). Entries older than the TTL are still
+# served, but trigger a background refresh (stale-while-revalidate).
+_TTL_ENDED  = 7 * 24 * 3600
+_TTL_AIRING = 24 * 3600
+_ENDED_STATUSES = {"Ended", "Canceled"}
+
+# Sub-resources fetched along with /tv/{id} in the same request
+_SHOW_APPEND = "external_ids,credits,watch/providers"
+
+_refreshing: set[str] = set()
+_background: set[asyncio.Task] = set()
+
+# In-process tiers: key -> (data, fetched_at), least recently used first.
+# Cached payloads are shared between callers, so treat them as read-only.
+#  - _memo holds small lookups not worth a file (searches, watch providers).
+#  - _hot sits in front of the disk cache. Show bundles and seasons run to tens
+#    of KB each and are already on disk (show bundles also in shows.tmdb_json),
+#    so only a small working set stays in memory.
+_MEMO_MAX = 2048
+_HOT_MAX  = 128
+_TTL_SEARCH    = 3600
+_TTL_PROVIDERS = 24 * 3600
+_memo: OrderedDict[str, tuple[object, float]] = OrderedDict()
+_hot: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+# Fetches in flight, so concurrent misses on one key share a single request
+_inflight: dict[str, asyncio.Future] = {}
+
+
+async def _get(url: str, **kwargs) -> httpx.Response:
+    async with _sem:
+        return await _client.get(url, **kwargs)
+
+
+async def aclose() -> None:
+    """Close the shared client's connections (called on app shutdown)."""
+    await _client.aclose()
+
+
+def _memo_get(memo: OrderedDict, key: str) -> tuple | None:
+    hit = memo.get(key)
+    if hit is not None:
+        memo.move_to_end(key)  # most recently used
+    return hit
+
+
+def _memo_put(memo: OrderedDict, limit: int, key: str, data, fetched_at: float | None = None) -> None:
+    if key in memo:
+        memo.move_to_end(key)
+    elif len(memo) >= limit:
+        memo.popitem(last=False)  # least recently used
+    memo[key] = (data, time.time() if fetched_at is None else fetched_at)
+
+
+async def _coalesced(key: str, fetch: Callable[[], Awaitable]):
+    """Await fetch(), sharing one in-flight request between concurrent callers of key."""
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(fetch())
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one caller going away doesn't cancel the others' fetch
+    return await asyncio.shield(future)
+
+
+async def memoized(key: str, fetch: Callable[[], Awaitable], ttl: int):
+    """Memory-only TTL cache for responses that aren't kept on disk.
+
+    Also used by routers for data derived from TMDB responses (e.g. processed
+    watch providers). Concurrent misses on one key share a single fetch.
+    """
+    hit = _memo_get(_memo, key)
+    if hit and time.time() - hit[1] < ttl:
+        return hit[0]
+    data = await _coalesced(key, fetch)
+    _memo_put(_memo, _MEMO_MAX, key, data)
+    return data
+
+
+def _cache_path(key: str) -> Path:
+    return Path(settings.tmdb_cache_dir) / f"{key}.json"
+
+
+def _cache_read(key: str) -> tuple[dict, float] | None:
+    """Return (data, fetched_at) for a cached response, or None on miss."""
+    path = _cache_path(key)
+    try:
+        return orjson.loads(path.read_bytes()), path.stat().st_mtime
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_write(key: str, data: dict) -> None:
+    path = _cache_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Per-thread temp name: writes run in worker threads and may overlap
+        tmp = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(orjson.dumps(data))
+        os.replace(tmp, path)
+    except OSError:
+        pass  # caching is best-effort
+
+
+async def _refresh(key: str, fetch: Callable[[], Awaitable[dict]]) -> None:
+    try:
+        data = await fetch()
+        _memo_put(_hot, _HOT_MAX, key, data)
+        await asyncio.to_thread(_cache_write, key, data)
+    except Exception:
+        pass  # keep serving the stale copy
+    finally:
+        _refreshing.discard(key)
+
+
+async def _cached(
+    key: str,
+    fetch: Callable[[], Awaitable[dict]],
+    ttl_for: Callable[[dict], int],
+    force: bool = False,
+) -> dict:
+    """Serve `key` from memory or the disk cache, refreshing in the background once stale."""
+    if not force:
+        hit = _memo_get(_hot, key)
+        if hit is None:
+            # File I/O and the parse run in a worker thread, off the event loop
+            hit = await asyncio.to_thread(_cache_read, key)
+            if hit:
+                _memo_put(_hot, _HOT_MAX, key, *hit)
+        if hit:
+            data, fetched_at = hit
+            if time.time() - fetched_at >= ttl_for(data) and key not in _refreshing:
+                _refreshing.add(key)
+                task = asyncio.create_task(_refresh(key, fetch))
+                _background.add(task)
+                task.add_done_callback(_background.discard)
+            return data
+    data = await _coalesced(key, fetch)
+    _memo_put(_hot, _HOT_MAX, key, data)
+    await asyncio.to_thread(_cache_write, key, data)
+    return data
+
+
+def show_ttl(data: dict) -> int:
+    """Seconds a /tv payload stays fresh — longer once the show has ended."""
+    return _TTL_ENDED if data.get("status") in _ENDED_STATUSES else _TTL_AIRING
+
+
+def _season_ttl(data: dict) -> int:
+    """Seasons whose episodes have all aired change rarely; others may gain dates/titles."""
+    today = time.strftime("%Y-%m-%d")
+    for ep in data.get("episodes", []):
+        if not ep.get("air_date") or ep["air_date"] >= today:
+            return _TTL_AIRING
+    return _TTL_ENDED
+
 
 async def search_tv(query: str) -> list[dict]:
-    """GET /search/tv?query={title}"""
-    r = await _client.get(
-        "/search/tv",
-        params={"query": query, "api_key": settings.tmdb_api_key},
-    )
-    r.raise_for_status()
-    return r.json().get("results", [])
+    """GET /search/tv?query={title} (memory-cached)"""
+    async def fetch() -> list[dict]:
+        r = await _get(
+            "/search/tv",
+            params={"query": query},
+        )
+        r.raise_for_status()
+        return orjson.loads(r.content).get("results", [])
 
+    return await memoized(f"search-tv-{query}", fetch, _TTL_SEARCH)
 
-async def get_show(tmdb_id: int) -> dict:
-    """GET /tv/{tmdb_id}?append_to_response=external_ids"""
-    r = await _client.get(
-        f"/tv/{tmdb_id}",
-        params={"api_key": settings.tmdb_api_key, "append_to_response": "external_ids"},
-    )
-    r.raise_for_status()
-    return r.json()
+
+async def get_show(tmdb_id: int, force: bool = False) -> dict:
+    """GET /tv/{tmdb_id}?append_to_response=external_ids,credits,watch/providers (disk-cached)"""
+    async def fetch() -> dict:
+        r = await _get(
+            f"/tv/{tmdb_id}",
+            params={"append_to_response": _SHOW_APPEND},
+        )
+        r.raise_for_status()
+        return orjson.loads(r.content)
+
+    return await _cached(f"show-{tmdb_id}", fetch, show_ttl, force)
 
 
 async def get_show_credits(tmdb_id: int) -> dict:
-    """GET /tv/{tmdb_id}/credits — returns {cast: [...], crew: [...]}"""
-    r = await _client.get(
-        f"/tv/{tmdb_id}/credits",
-        params={"api_key": settings.tmdb_api_key},
-    )
+    """Show cast and crew — {cast: [...], crew: [...]}.
+
+    Read from the get_show bundle; payloads cached before credits were appended
+    fall back to GET /tv/{tmdb_id}/credits.
+    """
+    bundle = await get_show(tmdb_id)
+    if "credits" in bundle:
+        return bundle["credits"]
+    r = await _get(f"/tv/{tmdb_id}/credits")
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
 async def get_person(tmdb_person_id: int) -> dict:
     """GET /person/{person_id}"""
-    r = await _client.get(
-        f"/person/{tmdb_person_id}",
-        params={"api_key": settings.tmdb_api_key},
-    )
+    r = await _get(f"/person/{tmdb_person_id}")
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
-async def get_season(tmdb_id: int, season_number: int) -> dict:
-    """GET /tv/{tmdb_id}/season/{season_number}"""
-    r = await _client.get(
-        f"/tv/{tmdb_id}/season/{season_number}",
-        params={"api_key": settings.tmdb_api_key},
-    )
-    r.raise_for_status()
-    return r.json()
+async def get_season(tmdb_id: int, season_number: int, force: bool = False) -> dict:
+    """GET /tv/{tmdb_id}/season/{season_number} (disk-cached)"""
+    async def fetch() -> dict:
+        r = await _get(f"/tv/{tmdb_id}/season/{season_number}")
+        r.raise_for_status()
+        return orjson.loads(r.content)
+
+    return await _cached(f"season-{tmdb_id}-{season_number}", fetch, _season_ttl, force)
 
 
 async def get_person_credits(tmdb_person_id: int) -> dict:
     """GET /person/{person_id}/combined_credits — tv + movie in one call"""
-    r = await _client.get(
-        f"/person/{tmdb_person_id}/combined_credits",
-        params={"api_key": settings.tmdb_api_key},
-    )
+    r = await _get(f"/person/{tmdb_person_id}/combined_credits")
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
 async def get_episode_credits(tmdb_id: int, season_number: int, episode_number: int) -> dict:
     """GET /tv/{tmdb_id}/season/{season}/episode/{episode}/credits — cast + guest_stars"""
-    r = await _client.get(
-        f"/tv/{tmdb_id}/season/{season_number}/episode/{episode_number}/credits",
-        params={"api_key": settings.tmdb_api_key},
-    )
+    r = await _get(f"/tv/{tmdb_id}/season/{season_number}/episode/{episode_number}/credits")
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
 async def search_movie(query: str) -> list[dict]:
     """GET /search/movie?query={title}"""
-    r = await _client.get(
+    r = await _get(
         "/search/movie",
-        params={"query": query, "api_key": settings.tmdb_api_key},
+        params={"query": query},
     )
     r.raise_for_status()
-    return r.json().get("results", [])
+    return orjson.loads(r.content).get("results", [])
 
 
 async def get_movie(tmdb_id: int) -> dict:
     """GET /movie/{tmdb_id}"""
-    r = await _client.get(
-        f"/movie/{tmdb_id}",
-        params={"api_key": settings.tmdb_api_key},
-    )
+    r = await _get(f"/movie/{tmdb_id}")
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
 async def get_movie_credits(tmdb_id: int) -> dict:
     """GET /movie/{tmdb_id}/credits — returns {cast: [...], crew: [...]}"""
-    r = await _client.get(
-        f"/movie/{tmdb_id}/credits",
-        params={"api_key": settings.tmdb_api_key},
-    )
+    r = await _get(f"/movie/{tmdb_id}/credits")
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
 async def get_watch_providers(tmdb_id: int) -> dict:
-    """GET /tv/{tmdb_id}/watch/providers — streaming/rent/buy options by region"""
-    r = await _client.get(
-        f"/tv/{tmdb_id}/watch/providers",
-        params={"api_key": settings.tmdb_api_key},
-    )
-    r.raise_for_status()
-    return r.json()
+    """Streaming/rent/buy options by region.
+
+    Read from the get_show bundle; payloads cached before providers were appended
+    fall back to GET /tv/{tmdb_id}/watch/providers (memory-cached).
+    """
+    bundle = await get_show(tmdb_id)
+    if "watch/providers" in bundle:
+        return bundle["watch/providers"]
+
+    async def fetch() -> dict:
+        r = await _get(f"/tv/{tmdb_id}/watch/providers")
+        r.raise_for_status()
+        return orjson.loads(r.content)
+
+    return await memoized(f"providers-{tmdb_id}", fetch, _TTL_PROVIDERS)
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch database
+# and TMDB cache before anything under backend/ is imported
+_tmp = tempfile.mkdtemp(prefix="whist-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/whist.db"
+os.environ["TMDB_CACHE_DIR"] = f"{_tmp}/tmdb_cache"
+os.environ.setdefault("TMDB_API_KEY", "test")
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from backend import tmdb
+from backend.main import app
+
+SHOW = {
+    "id": 3,
+    "name": "Test Show",
+    "poster_path": None,
+    "first_air_date": "2020-01-01",
+    "status": "Returning Series",
+    "seasons": [
+        {"season_number": 0},
+        {"season_number": 1},
+        {"season_number": 2},
+    ],
+}
+
+
+def _season(number: int) -> dict:
+    return {
+        "season_number": number,
+        "episodes": [
+            {"episode_number": n, "name": f"S{number}E{n}", "air_date": f"2020-0{number}-0{n}"}
+            for n in (1, 2, 3)
+        ],
+    }
+
+
+def test_episodes_fetches_seasons_missing_after_single_season_open(monkeypatch):
+    async def get_show(tmdb_id, force=False):
+        return SHOW
+
+    async def get_season(tmdb_id, season_number, force=False):
+        return _season(season_number)
+
+    monkeypatch.setattr(tmdb, "get_show", get_show)
+    monkeypatch.setattr(tmdb, "get_season", get_season)
+
+    client = TestClient(app)
+    assert client.post("/shows/add", json={"tmdb_id": 3}).status_code == 200
+
+    # Opening season 2 first caches only that season's rows
+    assert client.get("/shows/3/season/2").status_code == 200
+
+    episodes = client.get("/shows/3/episodes").json()
+    assert sorted({(e["season_number"], e["episode_number"]) for e in episodes}) == [
+        (s, e) for s in (1, 2) for e in (1, 2, 3)
+    ]
+
+    progress = client.get("/shows/3/progress").json()
+    assert progress["total"] == 6
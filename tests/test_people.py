@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+
+from backend import models, tmdb
+from backend.database import SessionLocal
+from backend.main import app
+
+PERSON_ID = 500
+MOVIES = {101: "Movie A", 102: "Movie B"}
+
+
+def test_seen_in_follows_a_watched_movie_swap(monkeypatch):
+    async def get_movie(tmdb_id):
+        return {"title": MOVIES[tmdb_id], "poster_path": None, "release_date": "2015-06-01"}
+
+    async def get_person_credits(tmdb_person_id):
+        return {"cast": [
+            {"id": movie_id, "title": title, "media_type": "movie", "character": "Lead"}
+            for movie_id, title in MOVIES.items()
+        ]}
+
+    async def get_person(tmdb_person_id):
+        return {"birthday": "1980-01-01", "imdb_id": "nm0000001"}
+
+    monkeypatch.setattr(tmdb, "get_movie", get_movie)
+    monkeypatch.setattr(tmdb, "get_person_credits", get_person_credits)
+    monkeypatch.setattr(tmdb, "get_person", get_person)
+
+    with SessionLocal() as db:
+        db.add(models.Person(tmdb_id=PERSON_ID, name="Test Person"))
+        db.commit()
+
+    client = TestClient(app)
+    for movie_id in MOVIES:
+        assert client.post("/movies", json={"tmdb_id": movie_id}).status_code == 200
+
+    def seen_in() -> list[int]:
+        body = client.get(f"/people/{PERSON_ID}/seen-in").json()
+        return [entry["tmdb_id"] for entry in body["main_cast"] + body["guest"]]
+
+    client.post("/movies/101/watched")
+    assert seen_in() == [101]
+
+    # Swap which movie is watched: the watched count is unchanged, the answer isn't
+    client.post("/movies/101/watched")
+    client.post("/movies/102/watched")
+    assert seen_in() == [102]